@@ -1,8 +1,10 @@
 
 import os
+import shlex
 import subprocess
 import sys
-import unittest
+import time
+import webbrowser
 from uuid import uuid4
 
 import nbformat
@@ -10,6 +12,7 @@ import nbformat
 from pyrope import examples, ExercisePool, ExerciseRunner
 from pyrope.core import CLIParser
 from pyrope.frontends import ConsoleFrontend
+from pyrope.testing import run_tests_from_args
 
 
 parser = CLIParser(prog='python3 -m pyrope')
@@ -63,9 +66,12 @@ if args.subcommand == 'run':
             )
         else:
             file = os.path.join(args.path, file)
+        # The notebook may be opened by a server running in another
+        # directory, so exercise files are given by absolute paths.
+        filepaths = [os.path.abspath(path) for path in args.filepaths]
         code = (
             'import pyrope\n\n'
-            f'%pyrope run {" ".join(args.filepaths)}'
+            f'%pyrope run {shlex.join(filepaths)}'
             f'{" --debug" if args.debug else ""}'
         )
         nb['cells'] = [nbformat.v4.new_code_cell(code)]
@@ -74,11 +80,32 @@ if args.subcommand == 'run':
         with open(file, 'w') as f:
             nbformat.write(nb, f)
 
-        jupyter_server = subprocess.Popen(['jupyter', 'notebook', file])
-        try:
-            jupyter_server.wait()
-        except KeyboardInterrupt:
-            pass
+        # Jupyter server modules are only needed for this frontend.
+        from pyrope import kernel_pool
+
+        server = None
+        if args.reuse_server:
+            server = kernel_pool.find_running_server(file)
+        if server is not None:
+            url = kernel_pool.notebook_url(server, file)
+            webbrowser.open(url)
+            print(f'Opened {url}, press Ctrl+C to finish.')
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                pass
+        else:
+            command = ['jupyter', 'notebook', file]
+            if args.kernel_pool > 0:
+                command += kernel_pool.server_arguments(
+                    args.kernel_pool, filepaths
+                )
+            jupyter_server = subprocess.Popen(command)
+            try:
+                jupyter_server.wait()
+            except KeyboardInterrupt:
+                pass
 
         # Cleanup
         while True:
@@ -109,13 +136,39 @@ if args.subcommand == 'run':
                 print('Please wait for cleanup.')
 
 if args.subcommand == 'test':
-    test_cases = [
-        test_case
-        for exercise in pool
-        for test_case in exercise.test_cases()
-    ]
-    suite = unittest.TestSuite(test_cases)
-    runner = unittest.TextTestRunner()
-    test_result = runner.run(suite)
-    if not test_result.wasSuccessful():
+    if not run_tests_from_args(pool, args):
+        sys.exit(1)
+
+# Modules of the following subcommands are only imported when needed.
+if args.subcommand == 'serve':
+    from pyrope.server import ExerciseServer
+
+    server = ExerciseServer(
+        pool, socket_path=args.socket, workers=args.workers,
+        max_requests=args.max_requests
+    )
+    server.serve_forever()
+
+if args.subcommand == 'grade':
+    from pyrope.grading import Grader
+
+    grader = Grader(args.filepaths, jobs=args.jobs, batch_size=args.batch_size)
+    count, duration = grader.grade(args.input, args.output)
+    print(grader.summary(count, duration))
+
+if args.subcommand == 'fuzz':
+    from pyrope.fuzzing import ParseFuzzer
+
+    if args.filepaths:
+        targets = ParseFuzzer.targets_from_pool(pool)
+    else:
+        targets = ParseFuzzer.default_targets()
+    fuzzer = ParseFuzzer(
+        targets, threshold=args.threshold, timeout=args.timeout
+    )
+    records = fuzzer.fuzz(count=args.count, seed=args.seed)
+    if args.report is not None:
+        fuzzer.write_report(records, args.report)
+    print(fuzzer.summary(records))
+    if any(record['flagged'] for record in records):
         sys.exit(1)
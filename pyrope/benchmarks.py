@@ -0,0 +1,359 @@
+import argparse
+import ast
+import itertools
+import numbers
+import socket
+import threading
+import time
+import timeit
+from uuid import uuid4
+
+import numpy as np
+
+from pyrope import config, dtypes, messages
+from pyrope.errors import ValidationError
+
+
+class Rate(float):
+    # Events per second, printed as such instead of as a duration.
+    pass
+
+
+def measure(function, number=None, repeat=3):
+    # The best of several repetitions in seconds per call.
+    timer = timeit.Timer(function)
+    if number is None:
+        number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def matrix_validation(sizes=(10, 100, 1000)):
+    """
+    Cast and type check square matrices of integers, floats, complex numbers
+    with vanishing imaginary parts and Python objects.
+    """
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        integers = rng.integers(-100, 100, (size, size))
+        values = {
+            'int': integers,
+            'float': rng.random((size, size)),
+            'complex': integers + 0j,
+            'object': integers.astype(object),
+        }
+        dtype = dtypes.MatrixType(sub_dtype=numbers.Real)
+        for label, value in values.items():
+            cast = dtype.cast(value)
+            yield f'{size}x{size} {label}', {
+                'cast': measure(lambda: dtype.cast(value)),
+                'check_type': measure(lambda: dtype.check_type(cast)),
+            }
+
+
+# Matrix inputs with their values, including Python literals which are not
+# tokenized but evaluated with 'ast.literal_eval'.
+valid_matrices = {
+    '1 2; 3 4': [[1, 2], [3, 4]],
+    '[[1, 2], [3, 4]]': [[1, 2], [3, 4]],
+    '[1, 1/2]': [[1, 0.5]],
+    '[[1+2i, 3]]': [[1 + 2j, 3]],
+    '[[(1+2j), 3]]': [[1 + 2j, 3]],
+    '[[1 + 2j, 3]]': [[1 + 2j, 3]],
+    '[[1_000, 2]]': [[1000, 2]],
+    '[[0x10, 2]]': [[16, 2]],
+    '[1_000, 2]': [[1000, 2]],
+}
+
+
+def matrix_parsing(sizes=(10, 30, 100)):
+    """
+    Parse square matrices of integers, floats and fractions given as nested
+    Python lists and row by row, compared to 'ast.literal_eval'. Inputs in
+    'valid_matrices' have to parse to their values.
+    """
+    dtype = dtypes.MatrixType()
+    for value, expected in valid_matrices.items():
+        assert np.array_equal(dtype.parse(value), expected), value
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        integers = rng.integers(-100, 100, (size, size))
+        values = {
+            'int': integers,
+            'float': rng.random((size, size)),
+            'fraction': np.vectorize(lambda n: f'{n}/7')(integers),
+        }
+        dtype = dtypes.MatrixType(maximum_entries=size * size)
+        for label, value in values.items():
+            nested = str(value.tolist()).replace("'", '')
+            rows = '; '.join(' '.join(map(str, row)) for row in value)
+            timings = {
+                'nested': measure(lambda: dtype.parse(nested)),
+                'rows': measure(lambda: dtype.parse(rows)),
+            }
+            if label != 'fraction':
+                timings['literal_eval'] = measure(
+                    lambda: ast.literal_eval(nested)
+                )
+            yield f'{size}x{size} {label}', timings
+
+
+def comparison(count=10000):
+    """
+    Score a cohort of answers against a sample solution one by one with
+    'compare' and at once with 'compare_many'.
+    """
+    rng = np.random.default_rng(0)
+    cases = {
+        'int': (dtypes.IntType(), [int(n) for n in rng.integers(0, 9, count)]),
+        'real': (dtypes.RealType(atol=0.1), list(rng.random(count))),
+        'string': (
+            dtypes.StringType(), [str(n) for n in rng.integers(0, 9, count)]
+        ),
+        'set': (
+            dtypes.SetType(compare='IoU'),
+            [set(row) for row in rng.integers(0, 9, (count, 4)).tolist()]
+        ),
+        '3x3 matrix': (
+            dtypes.MatrixType(), list(rng.integers(0, 3, (count, 3, 3)))
+        ),
+        'vector up to multiple': (
+            dtypes.VectorType(compare='up_to_multiple'),
+            list(rng.integers(0, 3, (count, 3)))
+        ),
+    }
+    for label, (dtype, values) in cases.items():
+        reference = values[0]
+        yield f'{count} {label}', {
+            'compare': measure(
+                lambda: [dtype.compare(value, reference) for value in values],
+                number=1
+            ),
+            'compare_many': measure(
+                lambda: dtype.compare_many(values, reference), number=1
+            ),
+        }
+
+
+# Inputs which the bounds on expressions must not reject, with the string
+# representations of their values.
+valid_expressions = {
+    'Rational(1, 3)': '1/3',
+    'Integer(3)': '3',
+    'Float(1.5)': '3/2',
+    'summation(x, (x, 1, 10))': '55',
+    '+'.join(['1'] * 100): '100',
+    'f(x) + g(x, 1)': 'f(x) + g(x, 1)',
+    '1' * 300: '1' * 300,
+}
+
+
+def expression_parsing(count=500):
+    """
+    Parse adversarial and random expressions, e.g. '9^9^9' or '(10^6)!',
+    whose evaluation is bounded by 'maximum_expression_digits'. The maximal
+    time is an upper bound for the parse time of learner input. Polynomial
+    input is also cast, which expands it. Inputs in 'valid_expressions' have
+    to parse to their values.
+    """
+    from pyrope import fuzzing
+
+    dtype = dtypes.ExpressionType(symbols='x y')
+    for value, expected in valid_expressions.items():
+        assert str(dtype.parse(value)) == expected, value
+    # Expensive expressions are kept unevaluated with the 'unevaluated'
+    # policy, including the substitution of 'e' and 'i'.
+    policy = config.expensive_expression_policy
+    config.expensive_expression_policy = 'unevaluated'
+    try:
+        for value in ('2^100000 + e', 'i*2^100000'):
+            dtype.parse(value)
+    finally:
+        config.expensive_expression_policy = policy
+    inputs = fuzzing.adversarial_inputs()
+    inputs += fuzzing.random_inputs(count, seed=0)
+    for label, dtype, template in (
+        ('expression', dtypes.ExpressionType(symbols='x y'), '{}'),
+        ('equation', dtypes.EquationType(symbols='x y'), '{} = x'),
+        ('polynomial', dtypes.PolynomialType(symbols='x y'), '{}'),
+        (
+            'linear expression', dtypes.LinearExpressionType(symbols='x y'),
+            '{}'
+        ),
+    ):
+        timings = []
+        for value in inputs:
+            value = template.format(value)
+            start = time.perf_counter()
+            try:
+                dtype.check_type(dtype.cast(dtype.parse(value)))
+            except ValidationError:
+                pass
+            timings.append(time.perf_counter() - start)
+        p50, p99 = np.percentile(timings, (50, 99))
+        yield f'{len(inputs)} {label}s', {
+            'p50': p50, 'p99': p99, 'max': max(timings)
+        }
+
+
+def validation(keystrokes=300):
+    """
+    Enter values into the widgets of elementwise complex, polynomial and
+    rational input fields one after another, each of which is validated.
+    """
+    from pyrope import nodes
+
+    problem = nodes.Problem(
+        '<<z>> <<p>> <<r>>', z=nodes.Complex(),
+        p=nodes.Polynomial(degree=3, elementwise=True, symbols='x'),
+        r=nodes.Rational()
+    )
+    widgets = problem.widgets
+    values = ['1', '1/', '1/2', '', '-3', 'x', '5']
+    # Consecutive values of a widget differ, also across repetitions.
+    counter = itertools.count()
+
+    def enter():
+        for _ in range(keystrokes):
+            i = next(counter)
+            widgets[i % len(widgets)].value = values[i % len(values)]
+
+    yield f'{keystrokes} keystrokes in {len(widgets)} widgets', {
+        'validate': measure(enter, number=1),
+    }
+
+
+def background_validation(text='m*c**2 + (m*c)**2/(1+m)', delays=(None, 0.1)):
+    """
+    Type an expression character by character every 20 ms into an exercise
+    run by a headless frontend, with synchronous and background validation.
+    Reports how long a keystroke blocks the frontend and the time from the
+    last keystroke until the input is validated.
+    """
+    from pyrope import examples
+    from pyrope.core import ExerciseRunner
+    from pyrope.frontends import HeadlessFrontend
+
+    for delay in delays:
+        runner = ExerciseRunner(examples.Einstein())
+        frontend = HeadlessFrontend()
+        runner.set_frontend(frontend)
+        frontend.set_runner(runner)
+        runner.set_validation_delay(delay)
+        runner.run()
+        start = len(frontend.messages)
+        widget = next(iter(frontend.widgets.values()))
+        blocking = []
+        for i in range(1, len(text) + 1):
+            time.sleep(0.02)
+            keystroke = time.perf_counter()
+            frontend.set_answers({'RHS': text[:i]})
+            blocking.append(time.perf_counter() - keystroke)
+        while widget.value != text or widget.valid is None:
+            time.sleep(0.001)
+        latency = time.perf_counter() - keystroke
+        runner.set_validation_delay(None)
+        batches = len(frontend.messages) - start
+        yield f'delay {delay}, {len(text)} keystrokes, {batches} batches', {
+            'keystroke': np.mean(blocking),
+            'max keystroke': max(blocking),
+            'latency': latency,
+        }
+
+
+def wire_format(count=10000):
+    """
+    Encode and decode typical messages between runners and frontends and
+    send them through a socket pair, in messages per second.
+    """
+    from pyrope import wire
+
+    widget_id = uuid4()
+    sample = [
+        messages.CreateWidget('runner', widget_id, 'Text'),
+        messages.ChangeWidgetAttributes('runner', widget_id, {
+            'description': '', 'info': 'an integer', 'placeholder': '',
+            'width': 20,
+        }),
+        messages.ChangeWidgetAttribute('frontend', widget_id, 'value', '42'),
+        messages.ChangeWidgetAttribute('runner', widget_id, 'valid', True),
+        messages.WidgetValidationError(
+            'runner', ValidationError('Integer expected.'), widget_id
+        ),
+        messages.ExerciseAttribute('runner', 'parameters', {
+            'a': 3, 'b': 0.5, 'v': np.arange(10), 'pair': (1, 2),
+        }),
+        messages.RenderTemplate('runner', 'problem', 'Compute <<a>>. ' * 20),
+        messages.WaitingForSubmission('runner'),
+    ]
+    batch = (sample * (count // len(sample) + 1))[:count]
+    encoded = [wire.dumps(msg) for msg in batch]
+    encode = measure(lambda: [wire.dumps(msg) for msg in batch], number=1)
+    decode = measure(lambda: [wire.loads(data) for data in encoded], number=1)
+
+    def transfer():
+        sender_socket, receiver_socket = socket.socketpair()
+        sender = wire.Connection.from_socket(sender_socket)
+        receiver = wire.Connection.from_socket(receiver_socket)
+
+        def send():
+            for msg in batch:
+                sender.send(msg)
+            sender.close()
+            sender_socket.close()
+
+        thread = threading.Thread(target=send)
+        thread.start()
+        received = sum(1 for _ in receiver)
+        thread.join()
+        receiver.close()
+        receiver_socket.close()
+        assert received == count
+
+    size = sum(map(len, encoded)) / count
+    yield f'{count} messages of {size:.0f} bytes', {
+        'encode': Rate(count / encode),
+        'decode': Rate(count / decode),
+        'socket': Rate(count / measure(transfer, number=1)),
+    }
+
+
+benchmarks = {
+    'background_validation': background_validation,
+    'comparison': comparison,
+    'expression_parsing': expression_parsing,
+    'matrix': matrix_validation,
+    'matrix_parsing': matrix_parsing,
+    'validation': validation,
+    'wire': wire_format,
+}
+
+
+def format_result(value):
+    # Plain numbers are durations in seconds.
+    if isinstance(value, Rate):
+        return f'{value:,.0f}/s'
+    return f'{value * 1000:.3f} ms'
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m pyrope.benchmarks',
+        description='Measure the performance of PyRope internals.'
+    )
+    parser.add_argument(
+        'names', nargs='*', choices=[[]] + list(benchmarks),
+        help='benchmarks to run (default: all)'
+    )
+    args = parser.parse_args(args)
+    for name in args.names or benchmarks:
+        print(f'{name}:')
+        for label, timings in benchmarks[name]():
+            timings = ', '.join(
+                f'{stage} {format_result(value)}'
+                for stage, value in timings.items()
+            )
+            print(f'  {label}: {timings}')
+
+
+if __name__ == '__main__':
+    main()
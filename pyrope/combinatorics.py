@@ -0,0 +1,77 @@
+import itertools
+import math
+
+
+def interactions(sizes, strength):
+    strength = min(strength, len(sizes))
+    return tuple(itertools.combinations(range(len(sizes)), strength))
+
+
+def covering_array(sizes, strength=2):
+    """
+    Greedily generate rows of value indices (one index per factor of the
+    given sizes) until every combination of values of any 'strength'
+    factors occurs in at least one row. If the strength is not less than the
+    number of factors, the full Cartesian product is generated.
+    """
+    sizes = tuple(sizes)
+    if not isinstance(strength, int) or strength < 1:
+        raise ValueError(
+            f"The strength of a covering array has to be a positive integer, "
+            f"got {strength}."
+        )
+    if strength >= len(sizes):
+        yield from itertools.product(*(range(size) for size in sizes))
+        return
+    uncovered = {
+        columns: set(itertools.product(
+            *(range(sizes[column]) for column in columns)
+        ))
+        for columns in interactions(sizes, strength)
+    }
+    by_column = {
+        column: [columns for columns in uncovered if column in columns]
+        for column in range(len(sizes))
+    }
+
+    def gain(row, column, value):
+        row[column] = value
+        gain = 0
+        for columns in by_column[column]:
+            values = tuple(row[c] for c in columns)
+            if None not in values and values in uncovered[columns]:
+                gain += 1
+        row[column] = None
+        return gain
+
+    while any(uncovered.values()):
+        row = [None] * len(sizes)
+        # Start with an uncovered combination to ensure progress.
+        columns = next(columns for columns in uncovered if uncovered[columns])
+        for column, value in zip(columns, min(uncovered[columns])):
+            row[column] = value
+        for column, size in enumerate(sizes):
+            if row[column] is None:
+                row[column] = max(
+                    range(size), key=lambda value: gain(row, column, value)
+                )
+        for columns, values in uncovered.items():
+            values.discard(tuple(row[column] for column in columns))
+        yield tuple(row)
+
+
+def coverage(rows, sizes, strength):
+    """
+    The ratio of all combinations of values of any 'strength' factors
+    occurring in the given rows of value indices.
+    """
+    covered = {columns: set() for columns in interactions(sizes, strength)}
+    for row in rows:
+        for columns, values in covered.items():
+            values.add(tuple(row[column] for column in columns))
+    total = sum(
+        math.prod(sizes[column] for column in columns) for columns in covered
+    )
+    if total == 0:
+        return 1.0
+    return sum(len(values) for values in covered.values()) / total
@@ -9,6 +9,35 @@ import tempfile
 maximum_input_length: int = 256
 
 
+# Maximum number of entries of matrix and vector input.
+#
+# Matrix and vector input is not limited by 'maximum_input_length' but by the
+# number of entries, each of which is limited by 'maximum_input_length'.
+maximum_matrix_entries: int = 10000
+
+
+# Limits for symbolic expression input.
+#
+# Expressions are analyzed before SymPy evaluates them. Expressions whose
+# syntax tree has more than 'maximum_expression_nodes' nodes or is nested
+# deeper than 'maximum_expression_depth' levels are rejected. Expressions
+# whose evaluation might compute numbers with more than
+# 'maximum_expression_digits' digits, e.g. '9^9^9' or '(10^6)!', are rejected
+# if 'expensive_expression_policy' is 'reject' or kept unevaluated if it is
+# 'unevaluated'. Note that comparing unevaluated expressions can still be
+# expensive. Python cannot convert integers with more than 4300 digits to
+# strings by default. Polynomial input is expanded, so it is always rejected
+# if it is too expensive or if its expanded form might have more than
+# 'maximum_polynomial_terms' terms or a degree higher than
+# 'maximum_polynomial_degree'.
+maximum_expression_nodes: int = 1000
+maximum_expression_depth: int = 64
+maximum_expression_digits: int = 4000
+expensive_expression_policy: str = 'reject'
+maximum_polynomial_terms: int = 200
+maximum_polynomial_degree: int = 10000
+
+
 # Transformations for parsing symbolic expressions.
 #
 # https://docs.sympy.org/latest/modules/parsing.html#parsing-transformations-reference
@@ -71,6 +100,65 @@ transformations: tuple[str, ...] = (
 maximum_test_repetitions: int = 1024
 
 
+# Parallel and adaptive exercise tests.
+#
+# The repetitions of the test 'test_maximal_total_score_is_stable' are shared
+# by 'test_processes' worker processes. The test stops early as soon as
+# 'test_distinct_parameters' distinct parameter sets have been checked or
+# after 'test_time_budget' seconds. 'None' disables the respective criterion.
+test_processes: int = 1
+test_distinct_parameters: int | None = None
+test_time_budget: float | None = None
+
+
+# Strength of the input combinations in exercise tests.
+#
+# Input dependent tests are run with combinations of no, trivial, dummy and
+# sample input for each input field. By default, all combinations are tested,
+# which are exponentially many. With a strength 't', a covering array is used
+# instead: Every combination of values of any 't' input fields is tested at
+# least once (e.g. 't = 2' for pairwise testing).
+test_input_strength: int | None = None
+
+
+# Parameter cache size.
+#
+# Parameters, solutions and maximal scores of a parametrized exercise are
+# cached by exercise id, seed, difficulty and global parameters, so that
+# re-opening or re-grading an exercise with the same seed does not recompute
+# them. This option limits the number of cached parametrizations per exercise.
+# Set it to 0 to disable the cache. Note that cached parameters are shared, so
+# exercises must not modify them in place.
+parameter_cache_size: int = 1024
+
+
+# Prefetching parametrized exercises.
+#
+# A prefetch pool keeps 'prefetch_size' fully evaluated parametrizations of
+# each exercise ready in a background thread, so that exercises start without
+# delay. The number can be set per exercise class name with 'prefetch_sizes'.
+prefetch_size: int = 0
+prefetch_sizes: dict[str, int] = {}
+
+
+# Template cache size.
+#
+# Templates of nodes, preambles, problems and feedbacks are compiled once and
+# cached by their template string. This option limits the number of cached
+# templates. Set it to 0 to disable the cache.
+template_cache_size: int = 1024
+
+
+# Background validation.
+#
+# Interactive frontends like the Jupyter frontend send input while the learner
+# is typing. Such input is validated in a background thread as soon as no
+# newer value of the same widget arrived for 'validation_delay' seconds.
+# Superseded values are not validated or their results are discarded. 'None'
+# validates every value immediately.
+validation_delay: float | None = 0.15
+
+
 # Valid representations for boolean values.
 #
 # Valid representations Python's boolean values False and True can be defined
@@ -121,6 +209,7 @@ summary_items = (
     'parameters',
     'preamble',
     'scores',
+    'seed',
     'solution',
     'started_at',
     'submitted_at',
@@ -166,6 +255,44 @@ logging: dict[dict[str: str, ...], ...] = {
 }
 
 
+# Test result cache.
+#
+# 'python -m pyrope test' skips exercises whose source, PyRope version and
+# test configuration did not change since their last passing test run. The
+# verdicts are stored in 'test_cache_file'. Exercises without retrievable
+# source code are always tested. An empty string disables the cache.
+test_cache_file: str = os.path.join(log_dir, 'test_cache.json')
+
+
+# Shared memory for NumPy arrays.
+#
+# 'ParametrizedExercise.share_arrays' moves NumPy arrays of at least
+# 'shared_memory_threshold' bytes in the parameters and solutions of an
+# exercise to shared memory. Such arrays are pickled as handles to the shared
+# memory, so that worker processes attach to them instead of copying them.
+shared_memory_threshold: int = 2 ** 20
+
+
+# Exercise source cache.
+#
+# The source code of an exercise class identifies the exercise and is read
+# once per class and process. If 'source_cache_file' is not empty, sources are
+# additionally stored in this file keyed by file path and modification time,
+# so that new processes do not need to re-read unchanged files.
+source_cache_file: str = ''
+
+
+# Jupyter kernel pool.
+#
+# 'python -m pyrope run' starts a Jupyter server which keeps
+# 'jupyter_kernel_pool_size' kernels with PyRope and the given exercises
+# already imported, so that further exercise notebooks opened on this server
+# with '--reuse-server' start immediately. The pool is disabled by 0, the
+# default. Pooled kernels keep the exercise files of the server they were
+# started for imported; other files are imported when they are opened.
+jupyter_kernel_pool_size: int = 0
+
+
 # Database configuration.
 #
 # If 'db_file' is an empty string, data is stored in-memory and is deleted when
@@ -173,3 +300,37 @@ logging: dict[dict[str: str, ...], ...] = {
 # one slash to use relative paths and two slashes for absolute paths.
 dialect: str = 'sqlite://'
 db_file: str = ''
+
+
+# Exercise server.
+#
+# 'python -m pyrope serve' preloads PyRope and the given exercises and forks
+# 'server_workers' worker processes which answer requests on the Unix socket
+# 'server_socket'. A worker closes its connection and is replaced by a fresh
+# one after it has answered 'server_max_requests' requests in order to cap
+# its memory growth. Each connection keeps at most 'server_max_exercises'
+# parametrized exercises, the least recently used ones are discarded.
+server_socket: str = os.path.join(tempfile.gettempdir(), 'pyrope.sock')
+server_workers: int = os.cpu_count() or 1
+server_max_requests: int = 1000
+server_max_exercises: int = 100
+
+
+# Fuzzing input parsing.
+#
+# 'python -m pyrope fuzz' feeds adversarial and random inputs to the data
+# types of input fields and flags inputs whose validation takes longer than
+# 'fuzz_latency_threshold' seconds. Inputs are validated in a separate process
+# which is killed after 'fuzz_timeout' seconds and whose address space is
+# limited to 'fuzz_memory_limit' bytes ('None' for no limit).
+fuzz_latency_threshold: float = 0.1
+fuzz_timeout: float = 5.0
+fuzz_memory_limit: int | None = 2 ** 31
+
+
+# Wire format for messages between runners and frontends.
+#
+# Frontends in other processes exchange messages with exercise runners over
+# sockets or pipes (see 'pyrope.wire'). Messages larger than
+# 'maximum_message_size' bytes are refused.
+maximum_message_size: int = 2 ** 24
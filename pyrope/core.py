@@ -1,7 +1,9 @@
 
 import abc
 import argparse
+import atexit
 import collections
+import contextlib
 from datetime import datetime
 from functools import cached_property
 from hashlib import sha3_256
@@ -15,22 +17,28 @@ import os
 import pathlib
 import random
 import sys
+import threading
 import unittest
+import weakref
 
 from IPython import get_ipython
 import numpy
 from sqlalchemy.sql import select
 
-from pyrope import config, frontends, tests
+from pyrope import (
+    combinatorics, config, frontends, shared_memory, testing, tests
+)
 from pyrope.config import process_total_score
 from pyrope.database import (
     Exercise as DBExercise, Result, Session as DBSession, User
 )
+from pyrope.dtypes import unshared
 from pyrope.errors import IllPosedError
 from pyrope.messages import (
-    ChangeWidgetAttribute, CreateWidget, ExerciseAttribute, RenderTemplate,
-    Submit, WaitingForSubmission
+    ChangeWidgetAttribute, CreateWidget, ExerciseAttribute, MessageBatch,
+    RenderTemplate, Submit, WaitingForSubmission, WidgetValidationError
 )
+from pyrope.scheduler import ValidationScheduler
 
 
 float_types = (bool, int, float, numpy.bool_, numpy.integer, numpy.floating)
@@ -52,6 +60,145 @@ for name, log_config in config.logging.items():
 history_log = logging.getLogger('history')
 
 
+# Parametrizing an exercise temporarily reseeds the global random generators,
+# which must not happen concurrently.
+global_random_lock = threading.RLock()
+
+
+@contextlib.contextmanager
+def seeded_global_random(seed):
+    with global_random_lock:
+        state = random.getstate()
+        numpy_state = numpy.random.get_state()
+        random.seed(seed)
+        numpy.random.seed(seed % 2**32)
+        try:
+            yield
+        finally:
+            random.setstate(state)
+            numpy.random.set_state(numpy_state)
+
+
+class ParameterCache:
+
+    def __init__(self):
+        self.entries = weakref.WeakKeyDictionary()
+        self.lock = threading.Lock()
+
+    def entry(self, exercise, key):
+        # Entries are kept per exercise instance because constructor
+        # arguments of an exercise can influence its parametrizations.
+        if config.parameter_cache_size <= 0:
+            return {}
+        with self.lock:
+            entries = self.entries.setdefault(
+                exercise, collections.OrderedDict()
+            )
+            if key in entries:
+                entries.move_to_end(key)
+                return entries[key]
+            entry = entries[key] = {}
+            while len(entries) > config.parameter_cache_size:
+                entries.popitem(last=False)
+            return entry
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+parameter_cache = ParameterCache()
+
+
+class SourceCache:
+
+    def __init__(self):
+        self.entries = None
+        # Entries which are not written to 'source_cache_file' yet.
+        self.changed = {}
+        self.lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def read(self):
+        try:
+            with open(config.source_cache_file) as file:
+                entries = json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logging.getLogger('pyrope').warning(
+                f'Ignoring source cache {config.source_cache_file}: {e}'
+            )
+            return {}
+        if not isinstance(entries, dict):
+            return {}
+        return entries
+
+    def load(self):
+        self.entries = {}
+        if config.source_cache_file:
+            self.entries = self.read()
+
+    def save(self, entries):
+        path = config.source_cache_file
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(entries, file)
+        os.replace(tmp_path, path)
+
+    def flush(self):
+        # New entries are written at once at exit. Entries written by other
+        # processes in the meantime, e.g. by other test shards, are merged
+        # instead of overwritten.
+        with self.lock:
+            if not self.changed or not config.source_cache_file:
+                return
+            changed, self.changed = self.changed, {}
+            entries = self.read() | changed
+            try:
+                self.save(entries)
+            except OSError as e:
+                logging.getLogger('pyrope').warning(
+                    f'Cannot write source cache: {e}'
+                )
+
+    def get(self, cls):
+        # Sources are persisted keyed by file path, modification time and
+        # size of the file, so that 'inspect.getsource' does not re-read and
+        # tokenize unchanged files in every process.
+        if not config.source_cache_file:
+            return self.getsource(cls)
+        try:
+            path = inspect.getsourcefile(cls)
+            stat = os.stat(path)
+        except (OSError, TypeError):
+            return self.getsource(cls)
+        key = f'{path}:{cls.__qualname__}'
+        stamp = [stat.st_mtime_ns, stat.st_size]
+        with self.lock:
+            if self.entries is None:
+                self.load()
+            entry = self.entries.get(key)
+            if entry is not None and entry['stamp'] == stamp:
+                return entry['source']
+            source = self.getsource(cls)
+            if source is not None:
+                self.entries[key] = {'stamp': stamp, 'source': source}
+                self.changed[key] = self.entries[key]
+            return source
+
+    @staticmethod
+    def getsource(cls):
+        try:
+            return inspect.getsource(cls)
+        except (OSError, TypeError):
+            return None
+
+
+source_cache = SourceCache()
+
+
 class Exercise(abc.ABC):
 
     # All possible metadata attributes.
@@ -143,24 +290,45 @@ class Exercise(abc.ABC):
 
         cls.__init__ = new_init
 
-    @cached_property
-    def _source(self):
-        try:
-            return inspect.getsource(self.__class__)
-        except OSError:
-            return None
+    # Sources and ids are cached per class, i.e. in the class' own
+    # '__dict__', because they must not be inherited by subclasses.
+    @classmethod
+    def class_source(cls):
+        if '_class_source' not in cls.__dict__:
+            cls._class_source = source_cache.get(cls)
+        return cls.__dict__['_class_source']
+
+    @classmethod
+    def exercise_source(cls):
+        if '_exercise_source' not in cls.__dict__:
+            classes = [
+                base.class_source() for base in cls.mro()[::-1]
+                if issubclass(base, Exercise) and base != Exercise
+            ]
+            if None in classes:
+                cls._exercise_source = None
+            else:
+                cls._exercise_source = '\n\n'.join(classes)
+        return cls.__dict__['_exercise_source']
+
+    @classmethod
+    def exercise_id(cls):
+        if '_exercise_id' not in cls.__dict__:
+            source = cls.exercise_source()
+            if source is None:
+                cls._exercise_id = None
+            else:
+                cls._exercise_id = sha3_256(source.encode()).hexdigest()
+        return cls.__dict__['_exercise_id']
 
-    @cached_property
+    @property
     def source(self):
-        classes = [
-            cls()._source for cls in self.__class__.mro()[::-1]
-            if issubclass(cls, Exercise) and cls != Exercise
-        ]
-        if None in classes:
-            return None
-        return '\n\n'.join(classes)
+        return self.exercise_source()
 
-    def run(self, debug=False, difficulty=None, global_parameters=None):
+    def run(
+        self, debug=False, difficulty=None, global_parameters=None, seed=None,
+        prefetch=None
+    ):
         if difficulty is not None:
             if not (
                 isinstance(difficulty, float_types) and
@@ -173,7 +341,8 @@ class Exercise(abc.ABC):
             difficulty = float(difficulty)
         self.difficulty = difficulty
         runner = ExerciseRunner(
-            self, debug=debug, global_parameters=global_parameters
+            self, debug=debug, global_parameters=global_parameters, seed=seed,
+            prefetch=prefetch
         )
         if get_ipython() is not None:
             frontend = frontends.JupyterFrontend()
@@ -216,17 +385,23 @@ class Exercise(abc.ABC):
         pexercise = ParametrizedExercise(self)
         yield from pexercise.test_cases()
 
-    def test(self, runner=None, suppress_output=False):
+    def test(
+        self, runner=None, suppress_output=False, durations=None, report=None
+    ):
         if runner is None:
             stream = io.StringIO() if suppress_output else None
-            runner = unittest.TextTestRunner(stream=stream)
-        suite = unittest.TestSuite(self.test_cases())
-        return runner.run(suite).wasSuccessful()
+            runner = unittest.TextTestRunner(
+                stream=stream, resultclass=testing.TimingTestResult
+            )
+        result = testing.run_tests(
+            (self,), runner=runner, durations=durations, report=report
+        )
+        return result.wasSuccessful()
 
 
 class ParametrizedExercise:
 
-    def __init__(self, exercise, global_parameters=None):
+    def __init__(self, exercise, global_parameters=None, seed=None):
         self.exercise = exercise
         self.global_parameters = global_parameters or {}
         if 'min_difficulty' not in self.global_parameters:
@@ -235,12 +410,32 @@ class ParametrizedExercise:
             self.global_parameters['max_difficulty'] = 1.0
         if 'user_name' not in self.global_parameters:
             self.global_parameters['user_name'] = 'John Doe'
+        if seed is None:
+            # A user gets the same parametrization of an exercise unless a
+            # seed is given.
+            exercise_id = self.id or exercise.__class__.__name__
+            seed = f"{self.global_parameters['user_name']}/{exercise_id}"
+        self.seed = self.normalize_seed(seed)
+        self.rng = random.Random(self.seed)
+        self._parameters = None
         self._total_score = None
         self._max_total_score = None
+        self._input_cases = {}
         self.user_name = None
         self.started_at = None
         self.submitted_at = None
 
+    @staticmethod
+    def normalize_seed(seed):
+        if isinstance(seed, str):
+            return int.from_bytes(sha3_256(seed.encode()).digest()[:8], 'big')
+        if not isinstance(seed, int) or isinstance(seed, bool) or seed < 0:
+            raise ValueError(
+                f"'seed' has to be a non-negative integer or a string, "
+                f"got {seed}."
+            )
+        return seed
+
     @staticmethod
     def apply(func, d):
         signature = inspect.signature(func)
@@ -265,9 +460,7 @@ class ParametrizedExercise:
 
     @cached_property
     def id(self):
-        if self.source is None:
-            return None
-        return sha3_256(self.source.encode()).hexdigest()
+        return self.exercise.exercise_id()
 
     @cached_property
     def source(self):
@@ -284,7 +477,11 @@ class ParametrizedExercise:
         return metadata
 
     @cached_property
-    def parameters(self):
+    def numpy_rng(self):
+        return numpy.random.default_rng(self.seed)
+
+    @cached_property
+    def difficulty(self):
         difficulty = self.exercise.difficulty
         if difficulty is None:
             min_ = self.exercise.min_difficulty
@@ -293,13 +490,108 @@ class ParametrizedExercise:
                 min_ = self.global_parameters['min_difficulty']
             if max_ is None:
                 max_ = self.global_parameters['max_difficulty']
-            difficulty = random.uniform(min_, max_)
-        kwargs = self.global_parameters | {'difficulty': difficulty}
-        pars = self.apply(self.exercise.parameters, kwargs)
+            difficulty = self.rng.uniform(min_, max_)
+        return difficulty
+
+    @cached_property
+    def cache(self):
+        if self.id is None:
+            return {}
+        global_parameters = tuple(sorted(
+            (name, repr(value))
+            for name, value in self.global_parameters.items()
+        ))
+        key = (self.id, self.seed, self.difficulty, global_parameters)
+        return parameter_cache.entry(self.exercise, key)
+
+    @property
+    def parameters(self):
+        if self._parameters is None:
+            self._parameters = self.compute_parameters()
+        return self._parameters
+
+    @parameters.setter
+    def parameters(self, parameters):
+        # Parameters assigned explicitly, e.g. those of a recorded submission
+        # in 'grading', need not match the cached parametrization of the
+        # seed, so values derived from them are not cached.
+        self._parameters = parameters
+        self.cache = {}
+
+    def compute_parameters(self):
+        if 'parameters' in self.cache:
+            return dict(self.cache['parameters'])
+        kwargs = self.global_parameters | {
+            'difficulty': self.difficulty,
+            'rng': self.rng,
+            'seed': self.seed,
+        }
+        signature = inspect.signature(self.exercise.parameters)
+        if 'numpy_rng' in signature.parameters:
+            kwargs['numpy_rng'] = self.numpy_rng
+        # Exercises using the global random generators are reproducible too.
+        with seeded_global_random(self.seed):
+            pars = self.apply(self.exercise.parameters, kwargs)
         if pars is None:
             pars = {}
+        self.cache['parameters'] = dict(pars)
         return pars
 
+    def attach_parameters(self, parameters):
+        """
+        Use the parameters of the same exercise, seed and global parameters
+        computed in another process, e.g. with arrays shared by
+        'share_arrays'. Unlike explicitly assigned parameters, they are
+        equal to the cached parametrization of the seed.
+        """
+        self._parameters = parameters
+
+    def share_arrays(self, threshold=None):
+        """
+        Move NumPy arrays of at least 'threshold' bytes in the parameters and
+        solutions to shared memory, so that worker processes receiving them
+        attach to the memory instead of copying the arrays. The memory is
+        released when this parametrization is garbage collected.
+        """
+        if threshold is None:
+            threshold = config.shared_memory_threshold
+        blocks = []
+
+        def share(values):
+            values = dict(values)
+            for name, value in values.items():
+                if (
+                    isinstance(value, numpy.ndarray) and
+                    not isinstance(value, shared_memory.SharedArray) and
+                    not value.dtype.hasobject and value.nbytes >= threshold
+                ):
+                    values[name], block = shared_memory.share(value)
+                    blocks.append(block)
+            return values
+
+        # Cached values are replaced instead of updated, because they may be
+        # shared with other parametrizations via the parameter cache. Shared
+        # parameters are equal to the cached ones.
+        self._parameters = share(self.parameters)
+        self.the_solution = share(self.the_solution)
+        self.a_solution = share(self.a_solution)
+        # The input fields and widgets refer to the shared solutions instead
+        # of their private copies. Their solutions are reset first, because
+        # solutions cannot be set twice.
+        if self.the_solution or self.a_solution:
+            self.model.solution = None
+            self.model.the_solution = None
+            self.model.a_solution = None
+            if self.the_solution:
+                self.model.the_solution = self.the_solution
+            if self.a_solution:
+                self.model.a_solution = self.a_solution
+        if blocks:
+            weakref.finalize(
+                self, shared_memory.unlink, blocks, os.getpid()
+            )
+        return len(blocks)
+
     @cached_property
     def model(self):
         model = self.apply(self.exercise.problem, self.parameters)
@@ -331,7 +623,11 @@ class ParametrizedExercise:
 
     @cached_property
     def the_solution(self):
-        explicit = self.apply(self.exercise.the_solution, self.parameters)
+        if 'the_solution' in self.cache:
+            explicit = self.cache['the_solution']
+        else:
+            explicit = self.apply(self.exercise.the_solution, self.parameters)
+            self.cache['the_solution'] = explicit
         if explicit is None:
             explicit = {}
         elif not isinstance(explicit, dict):
@@ -363,7 +659,11 @@ class ParametrizedExercise:
 
     @cached_property
     def a_solution(self):
-        solution = self.apply(self.exercise.a_solution, self.parameters)
+        if 'a_solution' in self.cache:
+            solution = self.cache['a_solution']
+        else:
+            solution = self.apply(self.exercise.a_solution, self.parameters)
+            self.cache['a_solution'] = solution
         if solution is None:
             solution = {}
         elif not isinstance(solution, dict):
@@ -415,7 +715,10 @@ class ParametrizedExercise:
 
     @property
     def answers(self):
-        return self.model.answers
+        return {
+            name: unshared(value)
+            for name, value in self.model.answers.items()
+        }
 
     @answers.setter
     def answers(self, answers):
@@ -443,6 +746,18 @@ class ParametrizedExercise:
 
     @cached_property
     def max_scores(self):
+        if 'max_scores' in self.cache:
+            self.solution
+            max_scores, self._max_total_score = self.cache['max_scores']
+            for name, value in max_scores.items():
+                if value is not None:
+                    self.ifields[name].displayed_max_score = value
+            return dict(max_scores)
+        max_scores = self.compute_max_scores()
+        self.cache['max_scores'] = (dict(max_scores), self._max_total_score)
+        return max_scores
+
+    def compute_max_scores(self):
         solution = self.solution
         scores = self.apply(
             self.exercise.scores, self.parameters | self.dummy_input
@@ -646,24 +961,56 @@ class ParametrizedExercise:
         return feedback if feedback is not None else ''
 
     @cached_property
-    def input_generator(self):
+    def input_factors(self):
         answers = [
             self.trivial_input,
             self.dummy_input,
             self.solution,
         ]
-        keys = self.ifields.keys()
-        factors = []
-        for key in keys:
+        factors = {}
+        for key in self.ifields.keys():
             factor = [None]
             for answer in answers:
                 if answer.get(key, None) is not None:
                     factor.append(answer[key])
-            factors.append(factor)
+            factors[key] = factor
+        return factors
+
+    def input_cases(self, limit=None):
+        # Input cases are tuples of indices into the input factors. Either
+        # all combinations or a covering array of the configured strength
+        # are generated, once for the coverage and the inputs.
+        key = (limit, config.test_input_strength)
+        if key not in self._input_cases:
+            sizes = [len(factor) for factor in self.input_factors.values()]
+            if config.test_input_strength is None:
+                cases = itertools.product(*(range(size) for size in sizes))
+            else:
+                cases = combinatorics.covering_array(
+                    sizes, config.test_input_strength
+                )
+            self._input_cases[key] = list(itertools.islice(cases, limit))
+        return self._input_cases[key]
+
+    def input_coverage(self, limit=None):
+        sizes = [len(factor) for factor in self.input_factors.values()]
+        strength = config.test_input_strength
+        if strength is None:
+            strength = len(sizes)
+        cases = self.input_cases(limit)
+        coverage = combinatorics.coverage(cases, sizes, strength)
+        return len(cases), min(strength, len(sizes)), coverage
 
-        def generator():
-            for values in itertools.product(*factors):
-                yield dict(zip(keys, values))
+    @cached_property
+    def input_generator(self):
+        factors = self.input_factors
+
+        def generator(limit=None):
+            for indices in self.input_cases(limit):
+                yield {
+                    key: factor[index]
+                    for (key, factor), index in zip(factors.items(), indices)
+                }
 
         return generator
 
@@ -687,16 +1034,31 @@ class ParametrizedExercise:
 
 class ExerciseRunner:
 
-    def __init__(self, exercise, debug=False, global_parameters=None):
+    def __init__(
+        self, exercise, debug=False, global_parameters=None, seed=None,
+        prefetch=None
+    ):
         self.debug = debug
         self.observers = []
-        self.pexercise = ParametrizedExercise(exercise, global_parameters)
+        self.batched_messages = None
+        self.lock = threading.RLock()
+        self.scheduler = None
+        self.unsynced = set()
+        self.pexercise = None
+        if prefetch is not None:
+            self.pexercise = prefetch.get(exercise, global_parameters, seed)
+        if self.pexercise is None:
+            self.pexercise = ParametrizedExercise(
+                exercise, global_parameters, seed=seed
+            )
         user_name = self.pexercise.global_parameters['user_name']
         self.pexercise.user_name = user_name
         self.sender = exercise.__class__
         self.widget_id_mapping = {
             widget.ID: widget for widget in self.pexercise.widgets
         }
+        for widget in self.pexercise.widgets:
+            widget.register_observer(self.notify)
         if self.pexercise.id is None:
             return
         with DBSession() as session:
@@ -723,55 +1085,59 @@ class ExerciseRunner:
 
     # TODO: enforce order of steps
     def run(self):
-        self.notify(ExerciseAttribute(self.sender, 'debug', self.debug))
-        self.notify(ExerciseAttribute(
-            self.sender, 'parameters', self.pexercise.parameters
-        ))
-        self.notify(ExerciseAttribute(
-            self.sender, 'hints', self.pexercise.hints
-        ))
-        self.notify(RenderTemplate(
-            self.sender, 'preamble', self.pexercise.preamble
-        ))
-        for widget in self.pexercise.widgets:
-            self.notify(CreateWidget(
-                self.sender, widget.ID, widget.__class__.__name__
+        # Frontends may block on 'WaitingForSubmission', hence it is not part
+        # of the batch.
+        with self.batch():
+            self.notify(ExerciseAttribute(self.sender, 'debug', self.debug))
+            self.notify(ExerciseAttribute(
+                self.sender, 'parameters', self.pexercise.parameters
             ))
-            widget.observe_attributes()
-            self.notify(ChangeWidgetAttribute(
-                self.sender, widget.ID, 'info', widget.info
+            self.notify(ExerciseAttribute(
+                self.sender, 'hints', self.pexercise.hints
             ))
-        self.notify(RenderTemplate(
-            self.sender, 'problem', self.pexercise.template
-        ))
-        if self.debug:
-            self.publish_solutions()
+            self.notify(RenderTemplate(
+                self.sender, 'preamble', self.pexercise.preamble
+            ))
+            for widget in self.pexercise.widgets:
+                self.notify(CreateWidget(
+                    self.sender, widget.ID, widget.__class__.__name__
+                ))
+                widget.observe_attributes()
+                self.notify(ChangeWidgetAttribute(
+                    self.sender, widget.ID, 'info', widget.info
+                ))
+            self.notify(RenderTemplate(
+                self.sender, 'problem', self.pexercise.template
+            ))
+            if self.debug:
+                self.publish_solutions()
         self.notify(WaitingForSubmission(self.sender))
         self.pexercise.started_at = datetime.utcnow()
 
     def finish(self):
         self.pexercise.submitted_at = datetime.utcnow()
-        if not self.debug:
-            self.publish_solutions()
-        self.notify(ExerciseAttribute(
-            self.sender, 'answers', self.pexercise.answers
-        ))
-        self.notify(ExerciseAttribute(
-            self.sender, 'max_total_score',
-            process_total_score(self.pexercise.max_total_score)
-        ))
-        self.notify(ExerciseAttribute(
-            self.sender, 'total_score',
-            process_total_score(self.pexercise.total_score)
-        ))
-        self.pexercise.correct
-        for widget in self.pexercise.model.widgets:
-            widget.show_max_score = True
-            widget.show_score = True
-            widget.show_correct = True
-        self.notify(RenderTemplate(
-            self.sender, 'feedback', self.pexercise.feedback
-        ))
+        with self.batch():
+            if not self.debug:
+                self.publish_solutions()
+            self.notify(ExerciseAttribute(
+                self.sender, 'answers', self.pexercise.answers
+            ))
+            self.notify(ExerciseAttribute(
+                self.sender, 'max_total_score',
+                process_total_score(self.pexercise.max_total_score)
+            ))
+            self.notify(ExerciseAttribute(
+                self.sender, 'total_score',
+                process_total_score(self.pexercise.total_score)
+            ))
+            self.pexercise.correct
+            for widget in self.pexercise.model.widgets:
+                widget.show_max_score = True
+                widget.show_score = True
+                widget.show_correct = True
+            self.notify(RenderTemplate(
+                self.sender, 'feedback', self.pexercise.feedback
+            ))
         if self.pexercise.id is None:
             return
         with DBSession() as session:
@@ -791,23 +1157,102 @@ class ExerciseRunner:
 
     def set_frontend(self, frontend):
         self.frontend = frontend
+        # Interactive frontends send values while the learner is typing.
+        if getattr(frontend, 'interactive', False):
+            self.set_validation_delay(config.validation_delay)
+
+    def set_validation_delay(self, delay):
+        """
+        Validate widget values sent by frontends in a background thread
+        as soon as no newer value of the widget arrived for 'delay' seconds,
+        or immediately if 'delay' is None.
+        """
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            self.scheduler.flush()
+            self.scheduler = None
+        if delay is not None:
+            self.scheduler = ValidationScheduler(self, delay)
 
     def register_observer(self, observer):
         self.observers.append(observer)
-        for widget in self.pexercise.widgets:
-            widget.register_observer(observer)
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Collect all messages of the runner and its widgets and send them as
+        one :py:class:`MessageBatch` on leaving the outermost batch, with the
+        attribute changes of each widget coalesced into one message.
+        """
+        if self.batched_messages is not None:
+            yield self.batched_messages
+            return
+        self.batched_messages = []
+        try:
+            yield self.batched_messages
+        finally:
+            messages, self.batched_messages = self.batched_messages, None
+            if len(messages) == 1:
+                self.notify(messages[0])
+            elif messages:
+                self.notify(MessageBatch.coalesce(self.sender, messages))
 
     def notify(self, msg):
+        if self.batched_messages is not None:
+            self.batched_messages.append(msg)
+            return
         for observer in self.observers:
             observer(msg)
 
+    def apply_value(self, widget_id, value, superseded=None):
+        """
+        Set the value of a widget, which validates its input field. The
+        resulting messages are discarded if 'superseded' returns True
+        afterwards, because a newer value of the widget is pending. The
+        validity and validation errors of the affected widgets are then sent
+        with the next value.
+        """
+        widget = self.widget_id_mapping[widget_id]
+        with self.lock, self.batch() as messages:
+            widget.value = value
+            if superseded is not None and superseded():
+                self.unsynced.update(
+                    msg.widget_id for msg in messages
+                    if getattr(msg, 'widget_id', None) is not None
+                )
+                messages.clear()
+                return
+            for ID in self.unsynced:
+                unsynced_widget = self.widget_id_mapping[ID]
+                self.notify(ChangeWidgetAttribute(
+                    repr(unsynced_widget), ID, 'valid', unsynced_widget.valid
+                ))
+                if unsynced_widget.valid is False:
+                    error = unsynced_widget.validation_error
+                    if error is not None:
+                        self.notify(WidgetValidationError(
+                            repr(error.ifield), error, ID
+                        ))
+            self.unsynced.clear()
+
     def observer(self, msg):
         if isinstance(msg, ChangeWidgetAttribute):
             if msg.attribute_name == 'value':
-                widget = self.widget_id_mapping[msg.widget_id]
-                widget.value = msg.attribute_value
+                if self.scheduler is None:
+                    self.apply_value(msg.widget_id, msg.attribute_value)
+                else:
+                    self.scheduler.submit(msg.widget_id, msg.attribute_value)
         elif isinstance(msg, Submit):
-            self.finish()
+            # All values entered before submitting are validated first.
+            self.set_validation_delay(None)
+            with self.lock:
+                self.finish()
+
+
+# Modification times of exercise files when they were last imported by
+# 'ExercisePool.add_exercises_from_file', e.g. in pooled Jupyter kernels.
+# Unchanged files are not reloaded.
+imported_files = {}
 
 
 class ExercisePool(collections.UserList):
@@ -843,11 +1288,23 @@ class ExercisePool(collections.UserList):
             )
         sys.path.insert(0, dirname)
         importlib.invalidate_caches()
-        if modulename in sys.modules:
-            module = sys.modules[modulename]
-            importlib.reload(module)
-        else:
+        path = os.path.abspath(os.path.join(dirname, filename))
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        module = sys.modules.get(modulename)
+        module_file = getattr(module, '__file__', None)
+        if module is None or module_file is None or (
+            os.path.abspath(module_file) != path
+        ):
+            # A module of the same name from another directory, e.g. one
+            # preloaded in a pooled Jupyter kernel, is replaced.
+            sys.modules.pop(modulename, None)
             module = importlib.import_module(modulename)
+        elif mtime is None or imported_files.get(path) != mtime:
+            module = importlib.reload(module)
+        imported_files[path] = mtime
         self.add_exercises_from_module(module, *exercises)
 
 
@@ -889,6 +1346,19 @@ class CLIParser:
             action='store_true',
             help='enables debug mode for the frontend',
         )
+        run_parser.add_argument(
+            '--reuse-server',
+            default=False,
+            action='store_true',
+            help='open the exercises on a running Jupyter server if possible',
+        )
+        run_parser.add_argument(
+            '--kernel-pool',
+            default=config.jupyter_kernel_pool_size,
+            type=int,
+            metavar='N',
+            help='number of pre-started kernels of a new Jupyter server',
+        )
 
         test_parser = subparsers.add_parser(
             'test',
@@ -901,6 +1371,164 @@ class CLIParser:
             help='paths to python scripts with exercise definitions',
             metavar='filepath',
         )
+        test_parser.add_argument(
+            '--no-cache',
+            default=False,
+            action='store_true',
+            help='test all exercises regardless of cached verdicts',
+        )
+        test_parser.add_argument(
+            '--clear-cache',
+            default=False,
+            action='store_true',
+            help='delete all cached verdicts before testing',
+        )
+        test_parser.add_argument(
+            '--prune-cache',
+            type=float,
+            metavar='DAYS',
+            help='delete cached verdicts older than DAYS days',
+        )
+        test_parser.add_argument(
+            '--durations',
+            default=0,
+            type=int,
+            metavar='N',
+            help='show the N slowest tests and input combinations',
+        )
+        test_parser.add_argument(
+            '--report',
+            metavar='FILE',
+            help='write wall and CPU times of all tests to a JSON file',
+        )
+        test_parser.add_argument(
+            '--shard',
+            type=testing.shard_spec,
+            metavar='i/N',
+            help='only test the i-th of N disjoint parts of the exercises',
+        )
+        test_parser.add_argument(
+            '--shard-by',
+            default='hash',
+            choices={'hash', 'duration'},
+            help='partition exercises by the hash of their source code or by '
+                 'their durations in the report given by --timings',
+        )
+        test_parser.add_argument(
+            '--timings',
+            metavar='FILE',
+            help='JSON report of a previous run for sharding by duration',
+        )
+        test_parser.add_argument(
+            '--merge',
+            nargs='+',
+            metavar='FILE',
+            help='merge the JSON reports of shards instead of testing',
+        )
+
+        serve_parser = subparsers.add_parser(
+            'serve',
+            help='serve exercises from preforked worker processes'
+        )
+        serve_parser.add_argument(
+            'filepaths',
+            nargs='*',
+            type=str,
+            help='paths to python scripts with exercise definitions',
+            metavar='filepath',
+        )
+        serve_parser.add_argument(
+            '--socket',
+            default=config.server_socket,
+            help='path of the Unix socket to listen on',
+        )
+        serve_parser.add_argument(
+            '--workers',
+            default=config.server_workers,
+            type=int,
+            help='number of worker processes',
+        )
+        serve_parser.add_argument(
+            '--max-requests',
+            default=config.server_max_requests,
+            type=int,
+            help='number of requests after which a worker is replaced',
+        )
+
+        grade_parser = subparsers.add_parser(
+            'grade',
+            help='grade submissions from a JSON Lines file'
+        )
+        grade_parser.add_argument(
+            'filepaths',
+            nargs='*',
+            type=str,
+            help='paths to python scripts with exercise definitions',
+            metavar='filepath',
+        )
+        grade_parser.add_argument(
+            '--input',
+            required=True,
+            help='JSON Lines file with one submission per line',
+        )
+        grade_parser.add_argument(
+            '--output',
+            required=True,
+            help='JSON Lines file to write the results to',
+        )
+        grade_parser.add_argument(
+            '--jobs',
+            default=os.cpu_count() or 1,
+            type=int,
+            help='number of worker processes',
+        )
+        grade_parser.add_argument(
+            '--batch-size',
+            default=16,
+            type=int,
+            help='number of submissions of an exercise graded at once',
+        )
+
+        fuzz_parser = subparsers.add_parser(
+            'fuzz',
+            help='measure parsing latencies of adversarial and random inputs'
+        )
+        fuzz_parser.add_argument(
+            'filepaths',
+            nargs='*',
+            type=str,
+            help='paths to python scripts with exercise definitions (default: '
+                 'all data types)',
+            metavar='filepath',
+        )
+        fuzz_parser.add_argument(
+            '--count',
+            default=100,
+            type=int,
+            help='number of random inputs per data type',
+        )
+        fuzz_parser.add_argument(
+            '--seed',
+            type=int,
+            help='seed for generating random inputs',
+        )
+        fuzz_parser.add_argument(
+            '--threshold',
+            default=config.fuzz_latency_threshold,
+            type=float,
+            help='latency in seconds from which on inputs are flagged',
+        )
+        fuzz_parser.add_argument(
+            '--timeout',
+            default=config.fuzz_timeout,
+            type=float,
+            help='time in seconds after which the validation is aborted',
+        )
+        fuzz_parser.add_argument(
+            '--report',
+            metavar='FILE',
+            help='write all inputs with their latencies to a JSON file',
+        )
 
     def parse_args(self, args=None, namespace=None):
         return self._parser.parse_args(args=args, namespace=namespace)
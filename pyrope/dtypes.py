@@ -1,10 +1,16 @@
 
 import abc
 import ast
+from copy import deepcopy
 from fractions import Fraction
+from functools import cached_property
+import inspect
+import itertools
+import math
 import numbers
 import re
 import tokenize
+import weakref
 
 import numpy as np
 import sympy
@@ -16,11 +22,33 @@ from pyrope.errors import ValidationError
 
 
 class TypeChecked:
+    """
+    The value of a node assembled from the values of its input fields and
+    run through the node's parsing, casting, normalization and type checking.
+    With 'memoize', the value or the validation error is stored in the
+    node's 'memoized' dictionary until a widget below the node changes.
+    """
+
+    def __init__(self, memoize=False):
+        self.memoize = memoize
 
     def __set_name__(self, owner, name):
         self.name = name
 
     def __get__(self, obj, objtype=None):
+        if not self.memoize:
+            return self.evaluate(obj)
+        if self.name not in obj.memoized:
+            try:
+                obj.memoized[self.name] = (self.evaluate(obj), None)
+            except ValidationError as e:
+                obj.memoized[self.name] = (None, e)
+        value, error = obj.memoized[self.name]
+        if error is not None:
+            raise error.with_traceback(None)
+        return value
+
+    def evaluate(self, obj):
         ifields = {
             name: getattr(obj.ifields[name], self.name)
             for name in obj.ifields
@@ -52,6 +80,14 @@ class TypeChecked:
             setattr(obj.ifields[name], self.name, value)
 
 
+def unshared(value):
+    # Memoized values are copied where exercise code receives them, so that
+    # it cannot modify them in place.
+    if isinstance(value, (dict, list, set, np.ndarray)):
+        return deepcopy(value)
+    return value
+
+
 # c.f. https://bugs.python.org/issue39159
 def safe_eval_string(s):
     if len(s) > config.maximum_input_length:
@@ -67,11 +103,521 @@ def safe_eval_string(s):
     return expr
 
 
-class DType(abc.ABC):
+real_number = r'(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?'
+matrix_entry_end = r'(?=[\s\[\]();,]|$)'
+matrix_token = re.compile(
+    r'(?P<open>[\[(])|(?P<close>[\])])|(?P<row>[;\n])|(?P<comma>,)|'
+    r'(?P<space>[^\S\n]+)|'
+    f'(?P<integer>[+-]?\\d+){matrix_entry_end}|'
+    f'(?P<fraction>[+-]?\\d+/\\d+){matrix_entry_end}|'
+    f'(?P<real>[+-]?{real_number}){matrix_entry_end}|'
+    f'(?P<complex>(?:[+-]?{real_number}(?=[+-]))?[+-]?'
+    f'(?:{real_number}\\*?)?[ijIJ]){matrix_entry_end}|'
+    r'(?P<invalid>[^\s\[\]();,]+)'
+)
+matrix_entry_kinds = ('integer', 'fraction', 'real', 'complex')
+# Rows enclosed in brackets themselves, as in nested Python lists.
+bracketed_rows = re.compile(r'\s*\[\s*[\[(]')
+
+
+def parse_complex(entry):
+    if '/' in entry:
+        return complex(Fraction(entry))
+    return complex(entry.replace('*', '').translate(str.maketrans('iI', 'jj')))
+
+
+def parse_fraction(entry):
+    if '/' in entry:
+        return Fraction(entry)
+    return int(entry)
+
+
+def parse_real(entry):
+    if '/' in entry:
+        return float(Fraction(entry))
+    return float(entry)
+
+
+def parse_numeric_matrix(s, maximum_entries=None):
+    """
+    Parse a matrix of numbers given row by row: Entries are separated by
+    commas or whitespace and rows by semicolons or line breaks, optionally
+    enclosed in brackets, or rows are enclosed in brackets themselves as in
+    nested Python lists. Entries are integers, fractions like '1/2', floats
+    or complex numbers like '1+2i'. The entries are tokenized in one pass and
+    converted into a preallocated two-dimensional array whose data type is
+    the most general one of all entries. Python lists with numeric literals
+    which are not tokenized, e.g. '(1+2j)', '1_000' or '0x10', are evaluated
+    with 'ast.literal_eval'.
+    """
+    if maximum_entries is None:
+        maximum_entries = config.maximum_matrix_entries
+    if len(s) > maximum_entries * (config.maximum_input_length + 1) + 2:
+        raise ValidationError(
+            f'Input size {len(s)} exceeds limit for a matrix with '
+            f'{maximum_entries} entries.'
+        )
+    try:
+        return tokenize_numeric_matrix(s, maximum_entries)
+    except ValidationError:
+        if not s.lstrip().startswith('['):
+            raise
+        try:
+            matrix = np.asarray(ast.literal_eval(s))
+        except (MemoryError, SyntaxError, TypeError, ValueError):
+            matrix = None
+        if matrix is None or matrix.dtype.kind not in 'iufc':
+            raise
+    if matrix.size > maximum_entries:
+        raise ValidationError(
+            f'Number of entries exceeds limit {maximum_entries}.'
+        )
+    # A single list is a row as in the tokenized input.
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    return matrix
+
+
+def tokenize_numeric_matrix(s, maximum_entries):
+    tokens = (
+        (match.lastgroup, match.group())
+        for match in matrix_token.finditer(s)
+        if match.lastgroup != 'space'
+    )
+    # The whole matrix is optionally enclosed in brackets, in which rows are
+    # enclosed in brackets as well if it starts with two brackets.
+    head = list(itertools.islice(tokens, 2))
+    wrapped = [kind for kind, _ in head[:1]] == ['open']
+    bracketed_rows = [kind for kind, _ in head] == ['open', 'open']
+    if wrapped:
+        head = head[1:]
+    entries, kinds, rows, row = [], set(), [], 0
+    in_row, after_entry, closed = not bracketed_rows, False, False
+    for kind, token in itertools.chain(head, tokens):
+        if closed:
+            raise ValidationError('Unbalanced brackets.')
+        if kind in matrix_entry_kinds:
+            if not in_row:
+                raise ValidationError('Entries must be enclosed in brackets.')
+            if len(token) > config.maximum_input_length:
+                raise ValidationError(
+                    f'Entry size {len(token)} exceeds limit '
+                    f'{config.maximum_input_length}.'
+                )
+            kinds.add(kind)
+            if len(entries) == maximum_entries:
+                raise ValidationError(
+                    f'Number of entries exceeds limit {maximum_entries}.'
+                )
+            entries.append(token)
+            row += 1
+            after_entry = True
+            continue
+        if kind == 'invalid':
+            raise ValidationError(f"Cannot convert '{token}' to a number.")
+        if kind == 'comma':
+            if in_row and not after_entry:
+                raise ValidationError('Missing entry before comma.')
+            after_entry = False
+            continue
+        if kind == 'open':
+            if in_row:
+                raise ValidationError('Rows cannot be nested.')
+            in_row, after_entry = True, False
+            continue
+        if kind == 'row' and bracketed_rows:
+            if in_row:
+                raise ValidationError('Row breaks within a row.')
+            continue
+        if kind == 'close':
+            if bracketed_rows and in_row:
+                if row == 0:
+                    raise ValidationError('Empty row.')
+                in_row = False
+            elif wrapped:
+                closed = True
+            else:
+                raise ValidationError('Unbalanced brackets.')
+        if row > 0:
+            rows.append(row)
+        row, after_entry = 0, False
+    if wrapped and not closed:
+        raise ValidationError('Unbalanced brackets.')
+    if row > 0:
+        rows.append(row)
+    if not rows:
+        raise ValidationError('Empty matrix.')
+    if len(set(rows)) > 1:
+        raise ValidationError('All rows must have the same number of entries.')
+    shape = (len(rows), rows[0])
+    if 'complex' in kinds:
+        dtype, convert = complex, parse_complex
+    elif 'real' in kinds:
+        dtype, convert = float, parse_real
+    elif 'fraction' in kinds:
+        dtype, convert = object, parse_fraction
+    else:
+        dtype, convert = np.int64, int
+    try:
+        try:
+            matrix = np.fromiter(map(convert, entries), dtype, len(entries))
+        except OverflowError:
+            if dtype is not np.int64:
+                raise
+            # Integers exceeding 64 bits are kept as Python integers.
+            matrix = np.fromiter(map(int, entries), object, len(entries))
+    except ZeroDivisionError:
+        raise ValidationError('Division by zero.')
+    except (ArithmeticError, ValueError) as e:
+        raise ValidationError(e)
+    return matrix.reshape(shape)
+
+
+# Names SymPy's parser can refer to, as in 'sympy.parse_expr'.
+sympy_globals = {}
+exec('from sympy import *', sympy_globals)
+
+# Functions which keep numeric arguments unevaluated or whose values are not
+# larger than their arguments. Values of all other functions, e.g. factorial,
+# binomial or prime, are bounded like factorials.
+elementary_functions = frozenset((
+    'Abs', 'Eq', 'Max', 'Min', 'acos', 'acot', 'acsc', 'asec', 'asin', 'atan',
+    'atan2', 'acosh', 'asinh', 'atanh', 'arg', 'cbrt', 'ceiling', 'conjugate',
+    'cos', 'cosh', 'cot', 'coth', 'csc', 'exp', 'floor', 'im', 'ln', 'log',
+    're', 'root', 'sec', 'sign', 'sin', 'sinh', 'sqrt', 'tan', 'tanh',
+))
+# Functions whose values grow exponentially with their arguments.
+exponential_functions = frozenset(('cosh', 'exp', 'sinh'))
+number_classes = frozenset(('Float', 'Integer', 'Rational'))
+# Digits of numeric constants, which are evaluated numerically e.g. to decide
+# the sign of an expression. The symbol 'e' is substituted by E unless it is
+# a variable.
+constant_sizes = {
+    'E': math.log10(math.e),
+    'GoldenRatio': math.log10((1 + math.sqrt(5)) / 2),
+    'TribonacciConstant': math.log10(1.84),
+    'pi': math.log10(math.pi),
+}
+symbol_sizes = {'e': constant_sizes['E']}
+chain_operators = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod)
+decimal_literal = re.compile(r'[+-]?(\d*)(?:\.(\d*))?(?:[eE]([+-]?\d+))?')
+
+
+def literal_size(value):
+    # The decimal logarithm of the larger of numerator and denominator of a
+    # numeric literal, i.e. its number of digits.
+    size = 0.0
+    for part in str(value).split('/'):
+        match = decimal_literal.fullmatch(part.strip().replace('_', ''))
+        if match is None:
+            continue
+        integer, fraction, exponent = match.groups()
+        fraction = fraction or ''
+        digits = (integer + fraction).lstrip('0')
+        if not digits:
+            continue
+        exponent = int(exponent or 0) - len(fraction)
+        digits_size = math.log10(int(digits[:15])) + max(len(digits) - 15, 0)
+        if exponent >= 0:
+            size += digits_size + exponent
+        else:
+            size += max(digits_size, float(-exponent))
+    return size
+
+
+def power_size(base, exponent):
+    # Digits of a power of a base with 'base' digits and an exponent with
+    # 'exponent' digits, i.e. less than 10**exponent.
+    if base == 0:
+        return exponent
+    if exponent > 300:
+        return math.inf
+    return max(exponent, base * 10 ** exponent)
+
+
+def expression_size(node, depth=0):
+    """
+    An upper bound for the number of digits of numerators and denominators
+    of the numbers SymPy computes when evaluating the syntax tree of a parsed
+    expression, without evaluating it. Constants like 'pi' count with the
+    digits of their values, because they are evaluated numerically e.g. to
+    decide the sign of an expression. Syntax which is not used for
+    expressions is rejected.
+    """
+    if depth > config.maximum_expression_depth:
+        raise ValidationError('Expression is nested too deeply.')
+    if isinstance(node, ast.Name):
+        return constant_sizes.get(node.id, 0.0)
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return literal_size(node.value)
+    if isinstance(node, ast.UnaryOp):
+        return expression_size(node.operand, depth + 1)
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+        return power_size(
+            expression_size(node.left, depth + 1),
+            expression_size(node.right, depth + 1)
+        )
+    if isinstance(node, ast.BinOp) and isinstance(node.op, chain_operators):
+        # Chains like '1 + 2 + ... + 100' are nested on the left, which does
+        # not count as nesting.
+        size = 0.0
+        while isinstance(node, ast.BinOp) and isinstance(
+            node.op, chain_operators
+        ):
+            size += expression_size(node.right, depth + 1)
+            if isinstance(node.op, (ast.Add, ast.Sub)):
+                size += math.log10(2)
+            node = node.left
+        return size + expression_size(node, depth + 1)
+    if isinstance(node, (ast.Tuple, ast.List)):
+        # E.g. limits like in 'summation(x, (x, 1, 10))'.
+        return max(
+            (expression_size(elt, depth + 1) for elt in node.elts),
+            default=0.0
+        )
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Call) and (
+        isinstance(node.func.func, ast.Name) and
+        node.func.func.id == 'Function'
+    ):
+        # Undefined functions like 'f(x)' keep their arguments unevaluated.
+        return max(
+            (expression_size(arg, depth + 1) for arg in node.args),
+            default=0.0
+        )
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+        name = node.func.id
+        for keyword in node.keywords:
+            if not isinstance(keyword.value, ast.Constant):
+                raise ValidationError('Unsupported keyword argument.')
+        if name == 'Symbol':
+            if len(node.args) == 1 and isinstance(node.args[0], ast.Constant):
+                return symbol_sizes.get(node.args[0].value, 0.0)
+            return 0.0
+        if name in number_classes:
+            # Literals are already wrapped in number classes, so that
+            # e.g. 'Rational(1, 3)' becomes 'Rational(Integer(1), Integer(3))'.
+            return sum(
+                literal_size(arg.value) if isinstance(arg, ast.Constant)
+                else expression_size(arg, depth + 1)
+                for arg in node.args
+            )
+        sizes = [expression_size(arg, depth + 1) for arg in node.args]
+        size = max(sizes, default=0.0)
+        if name == 'Pow' and len(sizes) == 2:
+            return power_size(*sizes)
+        if name in exponential_functions:
+            return power_size(constant_sizes['E'], size)
+        if name in elementary_functions:
+            return size
+        # The factorial of a number less than 10**size has less than
+        # size * 10**size digits.
+        return max(size, 1.0) * power_size(1.0, size)
+    raise ValidationError(f'Unsupported syntax: {type(node).__name__}.')
+
+
+def monomial_count(degree, variables):
+    # The number of monomials of at most the given degree in the given number
+    # of variables, i.e. binomial(degree + variables, variables).
+    if math.isinf(degree):
+        return math.inf
+    log = (
+        math.lgamma(degree + variables + 1) - math.lgamma(degree + 1) -
+        math.lgamma(variables + 1)
+    )
+    return math.exp(log) if log < 700 else math.inf
+
+
+def exponent_bound(node):
+    # Integer literals are taken as they are, other exponents are bounded by
+    # their number of digits.
+    if (
+        isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and
+        node.func.id == 'Integer' and len(node.args) == 1 and
+        isinstance(node.args[0], ast.Constant) and
+        isinstance(node.args[0].value, int)
+    ):
+        return abs(node.args[0].value)
+    size = expression_size(node)
+    return 10 ** size if size < 300 else math.inf
+
+
+def polynomial_size(node):
+    """
+    Upper bounds for the number of terms and the degree of the expanded form
+    of a parsed expression, and its generators, i.e. its symbols and function
+    calls. Expressions are sized with 'expression_size' before, which rejects
+    unsupported syntax and deep nesting.
+    """
+    if isinstance(node, (ast.Constant, ast.Name)):
+        return 1, 0, frozenset()
+    if isinstance(node, ast.UnaryOp):
+        return polynomial_size(node.operand)
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and (
+        node.func.id in number_classes
+    ):
+        return 1, 0, frozenset()
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow) or (
+        isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and
+        node.func.id == 'Pow' and len(node.args) == 2
+    ):
+        base, exponent = (
+            (node.left, node.right) if isinstance(node, ast.BinOp)
+            else node.args
+        )
+        terms, degree, generators = polynomial_size(base)
+        n = exponent_bound(exponent)
+        # The n-th power of a sum of t terms has at most binomial(n + t - 1,
+        # t - 1) terms.
+        terms = monomial_count(n, terms - 1)
+        degree = degree * n if degree else 0
+        return bounded_polynomial_size(terms, degree, generators)
+    if isinstance(node, ast.BinOp) and isinstance(node.op, chain_operators):
+        sizes = []
+        while isinstance(node, ast.BinOp) and isinstance(
+            node.op, chain_operators
+        ):
+            sizes.append((node.op, polynomial_size(node.right)))
+            node = node.left
+        terms, degree, generators = polynomial_size(node)
+        for op, (right_terms, right_degree, right_generators) in reversed(
+            sizes
+        ):
+            if isinstance(op, (ast.Add, ast.Sub)):
+                terms += right_terms
+                degree = max(degree, right_degree)
+            else:
+                terms *= right_terms
+                degree += right_degree
+            generators |= right_generators
+            terms, degree, generators = bounded_polynomial_size(
+                terms, degree, generators
+            )
+        return terms, degree, generators
+    # Symbols and all other function calls are generators.
+    return 1, 1, frozenset((ast.dump(node),))
+
+
+def bounded_polynomial_size(terms, degree, generators):
+    # A polynomial in k generators has at most as many terms as there are
+    # monomials of its degree in k variables.
+    return min(terms, monomial_count(degree, len(generators))), degree, (
+        generators
+    )
+
+
+def equal_many(values, reference):
+    # Elementwise equality of scalar values in C loops. Missing values (None)
+    # are never equal to the reference.
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return (array == reference).astype(float)
+
+
+def numeric_array(values, dtype):
+    # Missing values (None) are NaN, which is not close to any number.
+    return np.array(
+        [np.nan if value is None else value for value in values], dtype
+    )
+
+
+def freeze(value):
+    # A hashable representation of constructor arguments which tells apart
+    # equal values of different types, e.g. '1' and 'True'. Raises a
+    # 'TypeError' for unhashable values.
+    if isinstance(value, (list, tuple)):
+        return type(value), tuple(freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return type(value), frozenset(freeze(item) for item in value)
+    if isinstance(value, dict):
+        return dict, frozenset(
+            (freeze(key), freeze(item)) for key, item in value.items()
+        )
+    hash(value)
+    return type(value), value
+
+
+class DTypeMeta(abc.ABCMeta):
+    """
+    Data types are immutable, so that instances constructed with the same
+    arguments are shared instead of constructing and storing equal instances
+    for every node of every parametrization.
+    """
+
+    def __init__(cls, name, bases, namespace, **kwargs):
+        abc.ABCMeta.__init__(cls, name, bases, namespace, **kwargs)
+        cls.instances = weakref.WeakValueDictionary()
+        # Keyword arguments are passed on to the constructors of the base
+        # classes, so the arguments of all constructors are relevant.
+        cls.defaults = {}
+        for base in cls.__mro__:
+            if '__init__' not in vars(base) or base is object:
+                continue
+            parameters = inspect.signature(base.__init__).parameters
+            for parameter in list(parameters.values())[1:]:
+                if parameter.kind in (
+                    parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD
+                ):
+                    continue
+                cls.defaults.setdefault(parameter.name, parameter.default)
+        parameters = inspect.signature(cls.__init__).parameters
+        cls.positional = tuple(
+            parameter.name for parameter in list(parameters.values())[1:]
+            if parameter.kind == parameter.POSITIONAL_OR_KEYWORD
+        )
+
+    def key(cls, args, kwargs):
+        if len(args) > len(cls.positional):
+            return None
+        arguments = dict(cls.defaults)
+        for name, value in zip(cls.positional, args):
+            if name in kwargs:
+                return None
+            arguments[name] = value
+        for name, value in kwargs.items():
+            if name in arguments:
+                arguments[name] = value
+        configuration = tuple(
+            getattr(config, option) for option in cls.configuration
+        )
+        try:
+            return freeze((sorted(arguments.items()), configuration))
+        except TypeError:
+            return None
+
+    def __call__(cls, *args, **kwargs):
+        key = cls.key(args, kwargs)
+        if key is not None:
+            instance = cls.instances.get(key)
+            if instance is not None:
+                return instance
+        instance = abc.ABCMeta.__call__(cls, *args, **kwargs)
+        instance._frozen = True
+        if key is None:
+            return instance
+        return cls.instances.setdefault(key, instance)
+
+
+class DType(abc.ABC, metaclass=DTypeMeta):
+
+    # Configuration options which are evaluated by the constructor.
+    configuration = ()
 
     def __init__(self, **kwargs):
         pass
 
+    def __setattr__(self, name, value):
+        if getattr(self, '_frozen', False):
+            raise AttributeError(
+                f"'{self.__class__.__name__}' instances are immutable."
+            )
+        object.__setattr__(self, name, value)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
     def __init_subclass__(cls):
         def validate_trivial_value(f):
             def wrapper(self):
@@ -95,6 +641,20 @@ class DType(abc.ABC):
             return wrapper
         cls.parse = wrap_parsing(cls.parse)
 
+        def wrap_evaluation(f):
+            # Casting and type checking evaluate learner input, e.g. SymPy
+            # expressions, which can overflow or exhaust memory.
+            def wrapper(self, value):
+                try:
+                    return f(self, value)
+                except (MemoryError, OverflowError, RecursionError) as e:
+                    raise ValidationError(
+                        f'Input is too expensive to evaluate: {e}'
+                    )
+            return wrapper
+        cls.cast = wrap_evaluation(cls.cast)
+        cls.check_type = wrap_evaluation(cls.check_type)
+
     @property
     @abc.abstractmethod
     def dtype(self):
@@ -134,6 +694,21 @@ class DType(abc.ABC):
     def compare(self, LHS, RHS):
         return LHS == RHS
 
+    def compare_many(self, values, reference):
+        """
+        Compare many values, e.g. the answers of a cohort of learners, with
+        the same reference value and return an array of scores. Missing
+        values (None) score 0. Data types with vectorized comparisons
+        override this loop.
+        """
+        return np.fromiter(
+            (
+                0.0 if value is None else float(self.compare(value, reference))
+                for value in values
+            ),
+            float
+        )
+
     def normalize(self, value):
         return value
 
@@ -142,7 +717,7 @@ class BooleanType(DType):
 
     dtype = bool
 
-    @property
+    @cached_property
     def info(self):
         return 'a boolean'
 
@@ -163,6 +738,9 @@ class BooleanType(DType):
             return value.item()
         return value
 
+    def compare_many(self, values, reference):
+        return equal_many(list(values), reference)
+
 
 class ComplexType(DType):
 
@@ -174,9 +752,9 @@ class ComplexType(DType):
             raise ValueError("'rtol' must be real.")
         if not isinstance(atol, numbers.Real):
             raise ValueError("'atol' must be real.")
-        self.tols = dict(rtol=rtol, atol=atol)
+        self.tols = (rtol, atol)
 
-    @property
+    @cached_property
     def info(self):
         return 'a complex number'
 
@@ -205,7 +783,11 @@ class ComplexType(DType):
         return value
 
     def compare(self, LHS, RHS):
-        return np.isclose(LHS, RHS, **self.tols)
+        return np.isclose(LHS, RHS, *self.tols)
+
+    def compare_many(self, values, reference):
+        values = numeric_array(values, complex)
+        return np.isclose(values, reference, *self.tols).astype(float)
 
 
 class DictType(DType):
@@ -222,7 +804,7 @@ class DictType(DType):
                 )
         self.count = count
 
-    @property
+    @cached_property
     def info(self):
         if self.count is None:
             return 'a dictionary'
@@ -252,17 +834,18 @@ class DictType(DType):
 class ExpressionType(DType):
 
     dtype = sympy.Expr
+    configuration = ('transformations',)
 
     def __init__(self, symbols=None, transformations=None, **kwargs):
         DType.__init__(self, **kwargs)
         if symbols is None:
-            self.symbols = set()
+            self.symbols = frozenset()
         else:
             symbols = sympy.symbols(symbols)
             try:
-                self.symbols = set(symbols)
+                self.symbols = frozenset(symbols)
             except TypeError:
-                self.symbols = {symbols}
+                self.symbols = frozenset((symbols,))
         if transformations is None:
             transformations = tuple(
                 getattr(sympy.parsing.sympy_parser, transformation)
@@ -270,11 +853,11 @@ class ExpressionType(DType):
             )
         self.transformations = transformations
 
-    @property
+    @cached_property
     def info(self):
         if not self.symbols:
             return 'an expression'
-        return f'an expression in {self.symbols}'
+        return f'an expression in {set(self.symbols)}'
 
     def trivial_value(self):
         return Zero()
@@ -283,19 +866,56 @@ class ExpressionType(DType):
         return One()
 
     def parse(self, value):
+        # The expression is analyzed before SymPy evaluates it, because
+        # inputs like '9^9^9' or '(10^6)!' would not finish.
+        policy = config.expensive_expression_policy
+        if policy not in ('reject', 'unevaluated'):
+            raise ValueError(
+                "'expensive_expression_policy' must be 'reject' or "
+                f"'unevaluated', got '{policy}'."
+            )
+        try:
+            code = sympy.parsing.sympy_parser.stringify_expr(
+                value, {}, sympy_globals, self.transformations
+            )
+            tree = ast.parse(code, mode='eval')
+        except (
+            MemoryError, RecursionError, SyntaxError, TypeError, ValueError,
+            tokenize.TokenError
+        ) as e:
+            raise ValidationError(e)
+        if sum(1 for _ in ast.walk(tree)) > config.maximum_expression_nodes:
+            raise ValidationError('Expression is too long.')
+        evaluate = self.check_cost(tree.body)
         try:
             value = sympy.parse_expr(
-                value, transformations=self.transformations
+                value, transformations=self.transformations, evaluate=evaluate
             )
-        except (SyntaxError, TypeError, tokenize.TokenError) as e:
+        except (SyntaxError, TypeError, ValueError, tokenize.TokenError) as e:
+            raise ValidationError(e)
+        if not isinstance(value, sympy.Basic):
+            raise ValidationError(f'"{value}" is not an expression.')
+        constants = {sympy.Symbol('e'): sympy.E, sympy.Symbol('i'): sympy.I}
+        constants = {
+            symbol: constant for symbol, constant in constants.items()
+            if symbol not in self.symbols
+        }
+        # Unevaluated expressions must not be evaluated by the substitution.
+        try:
+            with sympy.core.parameters.evaluate(evaluate):
+                value = value.xreplace(constants)
+        except ValueError as e:
             raise ValidationError(e)
-        e, i = sympy.symbols('e, i')
-        if e not in self.symbols:
-            value = value.subs(e, sympy.E)
-        if i not in self.symbols:
-            value = value.subs(i, sympy.I)
         return value
 
+    def check_cost(self, node):
+        # Returns whether the expression is evaluated while parsing.
+        if expression_size(node) <= config.maximum_expression_digits:
+            return True
+        if config.expensive_expression_policy == 'reject':
+            raise ValidationError('Expression is too expensive to evaluate.')
+        return False
+
     def cast(self, value):
         if type(value) in (int, Fraction, float, complex):
             value = sympy.parse_expr(str(value))
@@ -314,7 +934,7 @@ class ExpressionType(DType):
                 raise ValidationError('Expression without variables expected.')
             else:
                 raise ValidationError(
-                    f'Expected an expression in {self.symbols}, '
+                    f'Expected an expression in {set(self.symbols)}, '
                     f'not in {value.free_symbols}.'
                 )
 
@@ -323,11 +943,11 @@ class EquationType(ExpressionType):
 
     dtype = sympy.Equality
 
-    @property
+    @cached_property
     def info(self):
         if not self.symbols:
             return 'an equation'
-        return f'an equation in {self.symbols}'
+        return f'an equation in {set(self.symbols)}'
 
     def trivial_value(self):
         return sympy.Equality(Zero(), Zero(), evaluate=False)
@@ -353,7 +973,7 @@ class EquationType(ExpressionType):
                 raise ValidationError('Equation without variables expected.')
             else:
                 raise ValidationError(
-                    f'Expected an equation in {self.symbols}, '
+                    f'Expected an equation in {set(self.symbols)}, '
                     f'not in {value.free_symbols}.'
                 )
 
@@ -372,12 +992,25 @@ class PolynomialType(ExpressionType):
         self.degree = degree
         self.elementwise = elementwise
 
-    @property
+    def check_cost(self, node):
+        # Polynomials are expanded by 'cast', so expensive expressions are
+        # rejected regardless of 'expensive_expression_policy'.
+        if expression_size(node) > config.maximum_expression_digits:
+            raise ValidationError('Expression is too expensive to evaluate.')
+        terms, degree, _ = polynomial_size(node)
+        if (
+            terms > config.maximum_polynomial_terms or
+            degree > config.maximum_polynomial_degree
+        ):
+            raise ValidationError('Polynomial is too large to expand.')
+        return True
+
+    @cached_property
     def info(self):
         if not self.symbols:
             return 'a constant polynomial'
         else:
-            info = f'a polynomial in {self.symbols}'
+            info = f'a polynomial in {set(self.symbols)}'
             if self.degree is not None:
                 info = f'{info} of degree {self.degree}'
             return info
@@ -427,11 +1060,11 @@ class LinearExpressionType(PolynomialType):
         kwargs.pop('degree', None)
         PolynomialType.__init__(self, degree=1, **kwargs)
 
-    @property
+    @cached_property
     def info(self):
         if not self.symbols:
             return 'a constant linear expression'
-        return f'a linear expression in {self.symbols}'
+        return f'a linear expression in {set(self.symbols)}'
 
     def check_type(self, value):
         ExpressionType.check_type(self, value)
@@ -467,7 +1100,7 @@ class IntType(DType):
         self.minimum = minimum
         self.maximum = maximum
 
-    @property
+    @cached_property
     def info(self):
         if self.minimum is None and self.maximum is None:
             return 'an integer'
@@ -520,18 +1153,33 @@ class IntType(DType):
                 f'got {value}.'
             )
 
+    def compare_many(self, values, reference):
+        # Python integers are not converted to floats to keep them exact.
+        return equal_many(list(values), reference)
+
 
 class MatrixType(DType):
 
     dtype = np.ndarray
+    configuration = ('maximum_matrix_entries',)
     sub_dtypes = (
         numbers.Integral, numbers.Rational, numbers.Real, numbers.Complex,
         numbers.Number
     )
+    # NumPy dtype kinds of arrays whose entries are instances of the sub data
+    # types. Booleans are not numbers.
+    sub_dtype_kinds = {
+        numbers.Integral: 'iu',
+        numbers.Rational: 'iu',
+        numbers.Real: 'iuf',
+        numbers.Complex: 'iufc',
+        numbers.Number: 'iufc',
+    }
 
     def __init__(
         self, nrows=None, ncols=None, sub_dtype=numbers.Number,
-        compare='elementwise', rtol=0, atol=0, **kwargs
+        compare='elementwise', rtol=0, atol=0, maximum_entries=None,
+        **kwargs
     ):
         DType.__init__(self, **kwargs)
         for dim, n in (('row', nrows), ('column', ncols)):
@@ -553,13 +1201,18 @@ class MatrixType(DType):
             raise ValueError("'rtol' must be real.")
         if not isinstance(atol, numbers.Real):
             raise ValueError("'atol' must be real.")
+        if maximum_entries is None:
+            maximum_entries = config.maximum_matrix_entries
+        if not isinstance(maximum_entries, int) or maximum_entries < 1:
+            raise ValueError("'maximum_entries' must be a positive integer.")
         self.nrows = nrows
         self.ncols = ncols
         self.sub_dtype = sub_dtype
         self.comparison = compare
-        self.tols = dict(rtol=rtol, atol=atol)
+        self.tols = (rtol, atol)
+        self.maximum_entries = maximum_entries
 
-    @property
+    @cached_property
     def info(self):
         if self.nrows is None and self.ncols is None:
             info = 'a matrix'
@@ -585,14 +1238,35 @@ class MatrixType(DType):
             ncols = 1
         return np.array(np.zeros((nrows, ncols)))
 
+    def parse(self, value):
+        return parse_numeric_matrix(value, self.maximum_entries)
+
     def cast(self, value):
         try:
-            value = np.array(value)
+            value = np.asarray(value)
+        except ValueError:
+            return value
+        kind = value.dtype.kind
+        if kind == 'O':
+            return self.cast_objects(value)
+        # The real part is a view, so at most the integer array is a copy.
+        if kind == 'c' and not value.imag.any():
+            value, kind = value.real, 'f'
+        if kind in 'biuf' and value.dtype != int:
+            with np.errstate(invalid='ignore'):
+                integers = value.astype(int)
+            if kind == 'b' or (integers == value).all():
+                value = integers
+        return value
+
+    @staticmethod
+    def cast_objects(value):
+        try:
             if np.all(np.real(value) == value):
                 value = np.real(value)
             if np.all(value.astype(int) == value):
                 value = value.astype(int)
-        except ValueError:
+        except (ArithmeticError, TypeError, ValueError):
             pass
         return value
 
@@ -612,21 +1286,57 @@ class MatrixType(DType):
             raise ValidationError(
                 f'Expected {self.ncols} columns, not {value.shape[1]}.'
             )
-        for element in value.flat:
-            if not isinstance(element, self.sub_dtype):
-                raise ValidationError(
-                    f'Entries must be {self.sub_dtype.__name__}s.'
-                )
+        self.check_sub_dtype(value, 'Entries')
+
+    def check_sub_dtype(self, value, entries):
+        # Only arrays of Python objects need to be checked element by element.
+        kind = value.dtype.kind
+        if kind == 'O':
+            valid = all(
+                isinstance(element, self.sub_dtype) for element in value.flat
+            )
+        else:
+            valid = kind in self.sub_dtype_kinds[self.sub_dtype]
+        if not valid:
+            raise ValidationError(
+                f'{entries} must be {self.sub_dtype.__name__}s.'
+            )
 
     def compare(self, LHS, RHS):
         if LHS.shape != RHS.shape:
             return 0.0
-        comparison_matrix = np.isclose(LHS, RHS, **self.tols)
+        comparison_matrix = np.isclose(LHS, RHS, *self.tols)
         if self.comparison == 'elementwise':
             return comparison_matrix.sum() / comparison_matrix.size
         if self.comparison == 'equality':
             return comparison_matrix.all()
 
+    def stack(self, values, reference):
+        # Values of the same shape as the reference are stacked into one
+        # array, all other values score 0.
+        values = list(values)
+        indices = [
+            i for i, value in enumerate(values)
+            if value is not None and value.shape == reference.shape
+        ]
+        if not indices:
+            return len(values), indices, None
+        return len(values), indices, np.stack([values[i] for i in indices])
+
+    def compare_many(self, values, reference):
+        count, indices, stacked = self.stack(values, reference)
+        scores = np.zeros(count)
+        if not indices:
+            return scores
+        comparison_matrices = np.isclose(
+            stacked, reference, *self.tols
+        ).reshape(len(indices), -1)
+        if self.comparison == 'elementwise':
+            scores[indices] = comparison_matrices.mean(axis=1)
+        if self.comparison == 'equality':
+            scores[indices] = comparison_matrices.all(axis=1)
+        return scores
+
 
 class OneOfType(DType):
 
@@ -651,7 +1361,7 @@ class OneOfType(DType):
         self.dtype = next(iter(option_dtypes))
         self.options = options
 
-    @property
+    @cached_property
     def info(self):
         return f"one of '{self.options}'"
 
@@ -678,7 +1388,7 @@ class RationalType(DType):
 
     dtype = Fraction
 
-    @property
+    @cached_property
     def info(self):
         return 'a rational number'
 
@@ -689,6 +1399,9 @@ class RationalType(DType):
         return Fraction(1, 2)
 
     def parse(self, value):
+        # Fraction expands exponents, e.g. in '1e999999999', to integers.
+        if literal_size(value) > config.maximum_expression_digits:
+            raise ValidationError('Number is too large.')
         try:
             return Fraction(value)
         except (ValueError, TypeError, ZeroDivisionError) as e:
@@ -699,6 +1412,9 @@ class RationalType(DType):
             return Fraction(str(value))
         return value
 
+    def compare_many(self, values, reference):
+        return equal_many(list(values), reference)
+
 
 class RealType(DType):
 
@@ -710,9 +1426,9 @@ class RealType(DType):
             raise ValueError("'rtol' must be real.")
         if not isinstance(atol, numbers.Real):
             raise ValueError("'atol' must be real.")
-        self.tols = dict(rtol=rtol, atol=atol)
+        self.tols = (rtol, atol)
 
-    @property
+    @cached_property
     def info(self):
         return 'a real number'
 
@@ -739,7 +1455,11 @@ class RealType(DType):
         return value
 
     def compare(self, LHS, RHS):
-        return np.isclose(LHS, RHS, **self.tols)
+        return np.isclose(LHS, RHS, *self.tols)
+
+    def compare_many(self, values, reference):
+        values = numeric_array(values, float)
+        return np.isclose(values, reference, *self.tols).astype(float)
 
 
 class SetType(DType):
@@ -758,7 +1478,7 @@ class SetType(DType):
         self.comparison = compare
         self.count = count
 
-    @property
+    @cached_property
     def info(self):
         if self.count is None:
             return 'a set'
@@ -798,6 +1518,21 @@ class SetType(DType):
                 return 1.0
             return len(intersection) / len(union)
 
+    def compare_many(self, values, reference):
+        if self.comparison == 'equality':
+            return DType.compare_many(self, values, reference)
+        # The size of the union follows from the size of the intersection,
+        # so only one new set is built per value.
+        values = list(values)
+        scores = np.zeros(len(values))
+        for i, value in enumerate(values):
+            if value is None:
+                continue
+            intersection = len(reference.intersection(value))
+            union = len(value) + len(reference) - intersection
+            scores[i] = 1.0 if union == 0 else intersection / union
+        return scores
+
 
 class StringType(DType):
 
@@ -812,7 +1547,7 @@ class StringType(DType):
         self.strip = strip
         self.squash_whitespaces = squash_whitespaces
 
-    @property
+    @cached_property
     def info(self):
         if self.ignore_case is True:
             return 'a case insensitive string'
@@ -842,6 +1577,9 @@ class StringType(DType):
             value = re.sub(r'\s+', ' ', value)
         return value
 
+    def compare_many(self, values, reference):
+        return equal_many(list(values), reference)
+
 
 class TupleType(DType):
 
@@ -857,7 +1595,7 @@ class TupleType(DType):
                 )
         self.count = count
 
-    @property
+    @cached_property
     def info(self):
         if self.count is None:
             return f'a {self.dtype.__name__}'
@@ -936,7 +1674,7 @@ class VectorType(MatrixType):
         self.count = count
         self.orientation = orientation
 
-    @property
+    @cached_property
     def info(self):
         if self.count is None:
             info = f'a {self.orientation} vector'
@@ -954,6 +1692,15 @@ class VectorType(MatrixType):
             return np.array([0])
         return np.array([0] * self.count)
 
+    def parse(self, value):
+        # Single lists as in '[1, 2, 3]' are vectors of either orientation,
+        # while rows and columns as in '[[1, 2, 3]]' or '1; 2; 3' keep their
+        # shape, which 'normalize' checks against the orientation.
+        matrix = MatrixType.parse(self, value)
+        if matrix.shape[0] == 1 and not bracketed_rows.match(value):
+            matrix = matrix.reshape(-1)
+        return matrix
+
     def normalize(self, value):
         if isinstance(value, self.dtype):
             if (
@@ -976,11 +1723,7 @@ class VectorType(MatrixType):
                 f'Expected a vector with {self.count} elements, '
                 f'not {value.size}.'
             )
-        for element in value:
-            if not isinstance(element, self.sub_dtype):
-                raise ValidationError(
-                    f'Elements must be {self.sub_dtype.__name__}s.'
-                )
+        self.check_sub_dtype(value, 'Elements')
 
     def compare(self, LHS, RHS):
         if LHS.shape[0] != RHS.shape[0]:
@@ -995,3 +1738,20 @@ class VectorType(MatrixType):
                     return 0.0
         else:
             return MatrixType.compare(self, LHS, RHS)
+
+    def compare_many(self, values, reference):
+        if self.comparison != 'up_to_multiple':
+            return MatrixType.compare_many(self, values, reference)
+        count, indices, stacked = self.stack(values, reference)
+        scores = np.zeros(count)
+        if not indices:
+            return scores
+        if not reference.any():
+            scores[indices] = (stacked == reference).all(axis=1)
+            return scores
+        # Each value and the reference form a 2xn matrix, whose rank is 1
+        # if and only if the nonzero value is a multiple of the reference.
+        pairs = np.stack(np.broadcast_arrays(stacked, reference), axis=1)
+        multiples = np.linalg.matrix_rank(pairs) == 1
+        scores[indices] = multiples & stacked.any(axis=1)
+        return scores
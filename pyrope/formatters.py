@@ -1,23 +1,66 @@
 
+import collections
 import re
+import threading
 
+from pyrope import config
 
-class TemplateFormatter:
 
-    @classmethod
-    def format(cls, template, **kwargs):
-        template = '\n'.join([line.strip() for line in template.split('\n')])
+class CompiledTemplate:
+
+    def __init__(self, template, formatter):
+        self.template = template
+        self.formatter = formatter
+        chunks = []
+        for literal_text, field_name, format_spec in formatter.parse(template):
+            literal_text = formatter.unescape(literal_text)
+            chunks.append((literal_text, field_name, format_spec))
+        self.chunks = tuple(chunks)
+        self.field_names = tuple(
+            field_name for _, field_name, _ in chunks if field_name is not None
+        )
+
+    def render(self, **kwargs):
         result = []
-        for literal_text, field_name, format_spec in cls.parse(template):
+        for literal_text, field_name, format_spec in self.chunks:
 
             if literal_text:
                 result.append(literal_text)
 
             if field_name is not None:
-                obj = cls.get_field(field_name, format_spec, kwargs)
-                result.append(cls.format_field(obj, format_spec))
+                obj = self.formatter.get_field(field_name, format_spec, kwargs)
+                result.append(self.formatter.format_field(obj, format_spec))
+
+        return ''.join(result)
+
+
+class TemplateFormatter:
+
+    cache = collections.OrderedDict()
+    lock = threading.Lock()
+
+    @classmethod
+    def compile(cls, template):
+        # Templates are compiled once and cached, because nodes and frontends
+        # format the same templates over and over again.
+        key = (cls, template)
+        with cls.lock:
+            if key in cls.cache:
+                cls.cache.move_to_end(key)
+                return cls.cache[key]
+        stripped = '\n'.join([line.strip() for line in template.split('\n')])
+        compiled = CompiledTemplate(stripped, cls)
+        if config.template_cache_size <= 0:
+            return compiled
+        with cls.lock:
+            cls.cache[key] = compiled
+            while len(cls.cache) > config.template_cache_size:
+                cls.cache.popitem(last=False)
+        return compiled
 
-        return ''.join(result).replace(r'\<\<', '<<').replace(r'\>\>', '>>')
+    @classmethod
+    def format(cls, template, **kwargs):
+        return cls.compile(template).render(**kwargs)
 
     @staticmethod
     def parse(s):
@@ -32,6 +75,10 @@ class TemplateFormatter:
             yield literal_text, field_name, format_spec
         yield s[text_start:], None, None
 
+    @staticmethod
+    def unescape(s):
+        return s.replace(r'\<\<', '<<').replace(r'\>\>', '>>')
+
     @staticmethod
     def get_field(field_name, format_spec, kwargs):
         if format_spec is None:
@@ -1,8 +1,10 @@
 
 from pyrope.frontends.console_frontend import ConsoleFrontend
+from pyrope.frontends.headless_frontend import HeadlessFrontend
 from pyrope.frontends.jupyter_frontend import JupyterFrontend
 
 __all__ = [
     'ConsoleFrontend',
+    'HeadlessFrontend',
     'JupyterFrontend'
 ]
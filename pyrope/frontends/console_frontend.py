@@ -5,8 +5,9 @@ from uuid import UUID
 
 from pyrope.formatters import TemplateFormatter
 from pyrope.messages import (
-    ChangeWidgetAttribute, CreateWidget, ExerciseAttribute, RenderTemplate,
-    Submit, WaitingForSubmission, WidgetValidationError
+    ChangeWidgetAttribute, ChangeWidgetAttributes, CreateWidget,
+    ExerciseAttribute, MessageBatch, RenderTemplate, Submit,
+    WaitingForSubmission, WidgetValidationError
 )
 
 
@@ -88,6 +89,15 @@ class ConsoleFrontend:
                 break
 
     def observer(self, msg):
+        if isinstance(msg, MessageBatch):
+            for batched_msg in msg:
+                self.observer(batched_msg)
+            return
+        if isinstance(msg, ChangeWidgetAttributes):
+            for changed_attribute in msg.split():
+                self.observer(changed_attribute)
+            return
+
         if self.debug:
             print(msg)
 
@@ -0,0 +1,185 @@
+from dataclasses import dataclass, field
+from uuid import UUID
+
+from pyrope.formatters import TemplateFormatter
+from pyrope.messages import (
+    ChangeWidgetAttribute, ChangeWidgetAttributes, CreateWidget,
+    ExerciseAttribute, MessageBatch, RenderTemplate, Submit,
+    WaitingForSubmission, WidgetValidationError
+)
+
+
+@dataclass
+class HeadlessWidget:
+
+    ID: UUID
+    widget_type: str
+    attributes: dict = field(default_factory=dict)
+
+    @property
+    def value(self):
+        return self.attributes.get('value')
+
+    @property
+    def valid(self):
+        return self.attributes.get('valid')
+
+
+class HeadlessFrontend:
+
+    def __init__(self, record=True):
+        self.answers = {}
+        self.debug = False
+        self.errors = {}
+        self.hints = ()
+        self.messages = []
+        self.parameters = {}
+        self.record = record
+        self.runner = None
+        self.submitted = False
+        self.templates = {}
+        self.total_score, self.max_total_score = None, None
+        self.waiting = False
+        self.widgets = {}
+        self.handlers = {
+            ChangeWidgetAttribute: self.change_widget_attribute,
+            ChangeWidgetAttributes: self.change_widget_attributes,
+            CreateWidget: self.create_widget,
+            ExerciseAttribute: self.change_exercise_attribute,
+            MessageBatch: self.handle_batch,
+            RenderTemplate: self.render_template,
+            WaitingForSubmission: self.wait_for_submission,
+            WidgetValidationError: self.widget_validation_error,
+        }
+
+    def set_runner(self, runner):
+        self.runner = runner
+        runner.register_observer(self.observer)
+
+    def formatter(self, template, **kwargs):
+        return TemplateFormatter.format(
+            template, **(self.parameters | kwargs)
+        )
+
+    @property
+    def preamble(self):
+        if 'preamble' not in self.templates:
+            return None
+        return self.formatter(self.templates['preamble'])
+
+    @property
+    def problem(self):
+        if 'problem' not in self.templates:
+            return None
+        return self.formatter(self.templates['problem'])
+
+    @property
+    def feedback(self):
+        if 'feedback' not in self.templates:
+            return None
+        return self.formatter(self.templates['feedback'], **self.answers)
+
+    def observer(self, msg):
+        if self.record:
+            self.messages.append(msg)
+        self.handle(msg)
+
+    def handle(self, msg):
+        handler = self.handlers.get(type(msg))
+        if handler is not None:
+            handler(msg)
+
+    def handle_batch(self, msg):
+        for batched_msg in msg:
+            self.handle(batched_msg)
+
+    def change_widget_attribute(self, msg):
+        self.set_widget_attribute(
+            msg.widget_id, msg.attribute_name, msg.attribute_value
+        )
+
+    def change_widget_attributes(self, msg):
+        for name, value in msg.attributes.items():
+            self.set_widget_attribute(msg.widget_id, name, value)
+
+    def set_widget_attribute(self, widget_id, name, value):
+        self.widgets[widget_id].attributes[name] = value
+        # Errors of widgets which are valid or empty are outdated.
+        if name == 'valid' and value is not False:
+            self.errors.pop(widget_id, None)
+
+    def create_widget(self, msg):
+        self.widgets[msg.widget_id] = HeadlessWidget(
+            msg.widget_id, msg.widget_type
+        )
+
+    def change_exercise_attribute(self, msg):
+        match msg.attribute_name:
+            case 'answers':
+                self.answers = msg.attribute_value
+            case 'debug':
+                self.debug = msg.attribute_value
+            case 'hints':
+                self.hints = msg.attribute_value
+            case 'max_total_score':
+                self.max_total_score = msg.attribute_value
+            case 'parameters':
+                self.parameters = msg.attribute_value
+            case 'total_score':
+                self.total_score = msg.attribute_value
+
+    def render_template(self, msg):
+        self.templates[msg.template_type] = msg.template
+
+    def wait_for_submission(self, msg):
+        self.waiting = True
+
+    def widget_validation_error(self, msg):
+        self.errors[msg.widget_id] = str(msg.error)
+
+    def widget_ids(self, key):
+        if key in self.widgets:
+            return (key,)
+        try:
+            ID = UUID(key)
+        except (AttributeError, TypeError, ValueError):
+            pass
+        else:
+            if ID in self.widgets:
+                return (ID,)
+        ifields = self.runner.pexercise.ifields
+        if key not in ifields:
+            raise KeyError(f"There is no input field or widget '{key}'.")
+        return tuple(widget.ID for widget in ifields[key].widgets)
+
+    def set_answers(self, answers):
+        """
+        Send answers to the runner. Keys are input field names or widget IDs.
+        Input fields consisting of several widgets take a sequence with one
+        value per widget.
+        """
+        for key, value in answers.items():
+            widget_ids = self.widget_ids(key)
+            if len(widget_ids) == 1:
+                values = (value,)
+            else:
+                values = tuple(value)
+                if len(values) != len(widget_ids):
+                    raise ValueError(
+                        f"Input field '{key}' expects {len(widget_ids)} "
+                        f"values, got {len(values)}."
+                    )
+            for widget_id, value in zip(widget_ids, values):
+                self.notify(ChangeWidgetAttribute(
+                    self.__class__, widget_id, 'value', value
+                ))
+
+    def submit(self, answers=None):
+        if answers is not None:
+            self.set_answers(answers)
+        self.waiting = False
+        self.submitted = True
+        self.notify(Submit(self.__class__))
+
+    def notify(self, msg):
+        self.runner.observer(msg)
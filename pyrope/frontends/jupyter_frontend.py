@@ -5,13 +5,18 @@ import pyrope_ipywidgets
 
 
 from pyrope.messages import (
-    ChangeWidgetAttribute, CreateWidget, ExerciseAttribute, RenderTemplate,
-    WaitingForSubmission, WidgetValidationError
+    ChangeWidgetAttribute, ChangeWidgetAttributes, CreateWidget,
+    ExerciseAttribute, MessageBatch, RenderTemplate, WaitingForSubmission,
+    WidgetValidationError
 )
 
 
 class JupyterFrontend:
 
+    # Values are sent while the learner is typing and validated in the
+    # background, see 'validation_delay'.
+    interactive = True
+
     def __init__(self, widget_factory=None):
         self.answers = {}
         self.exercise = pyrope_ipywidgets.Exercise(self.notify)
@@ -29,7 +34,13 @@ class JupyterFrontend:
 
     def observer(self, msg):
         self.exercise.debug_output.append_stdout(f'{msg}\n')
-        if isinstance(msg, ExerciseAttribute):
+        self.handle(msg)
+
+    def handle(self, msg):
+        if isinstance(msg, MessageBatch):
+            for batched_msg in msg:
+                self.handle(batched_msg)
+        elif isinstance(msg, ExerciseAttribute):
             match msg.attribute_name:
                 case 'answers':
                     self.answers = msg.attribute_value
@@ -65,6 +76,13 @@ class JupyterFrontend:
         elif isinstance(msg, ChangeWidgetAttribute):
             widget = self.widgets[f'#{msg.widget_id}']
             setattr(widget, msg.attribute_name, msg.attribute_value)
+        elif isinstance(msg, ChangeWidgetAttributes):
+            # All changed attributes of a widget are synchronized with the
+            # browser in one comm message.
+            widget = self.widgets[f'#{msg.widget_id}']
+            with widget.hold_sync():
+                for name, value in msg.attributes.items():
+                    setattr(widget, name, value)
         elif isinstance(msg, WidgetValidationError):
             widget = self.widgets[f'#{msg.widget_id}']
             widget.change_hover_text(msg.error.args[0])
@@ -0,0 +1,294 @@
+import json
+import multiprocessing
+import random
+import string
+import time
+
+import numpy
+
+from pyrope import config, dtypes
+from pyrope.core import ParametrizedExercise
+from pyrope.errors import ValidationError
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+stages = ('parse', 'cast', 'normalize', 'check_type')
+
+
+# Constructor arguments for data types which cannot be instantiated without
+# arguments or whose defaults would skip relevant code paths.
+default_kwargs = {
+    dtypes.EquationType: {'symbols': 'x y'},
+    dtypes.ExpressionType: {'symbols': 'x y'},
+    dtypes.LinearExpressionType: {'symbols': 'x y'},
+    dtypes.OneOfType: {'options': ('a', 'b')},
+    dtypes.PolynomialType: {'symbols': 'x y'},
+}
+
+
+# Tokens random inputs are composed of.
+tokens = tuple(string.digits) + (
+    ' ', '+', '-', '*', '/', '^', '**', '!', '.', ',', ':', '(', ')', '[',
+    ']', '{', '}', "'", 'e', 'E', 'i', 'I', 'j', 'x', 'y', 'pi', 'oo', 'nan',
+    'inf', 'True', 'False', 'sqrt', 'factorial', 'exp', 'log', 'Matrix',
+)
+
+
+def adversarial_inputs(length=None):
+    # Inputs known to be expensive for 'ast.literal_eval' or 'sympy.parse_expr'
+    # are scaled up to the maximal input length.
+    if length is None:
+        length = config.maximum_input_length
+    half = (length - 1) // 2
+    inputs = [
+        '9' * length,
+        '9**9**9',
+        '10**10**10**10',
+        '2^2^2^2^2^2',
+        'E**E**E**E**E',
+        '9' + '!' * (length - 1),
+        '99999!',
+        'factorial(' * ((length - 1) // 11) + '9' + ')' * ((length - 1) // 11),
+        '(' * half + '1' + ')' * half,
+        '[' * half + ']' * half,
+        '{' * half + '}' * half,
+        '-' * (length - 1) + '1',
+        '~' * (length - 1) + '1',
+        'x' + '**x' * ((length - 1) // 3),
+        '(x+y)**99999',
+        '(x+1)**999*(y+1)**999',
+        '1e999',
+        '1e308*10',
+        '9' * 128 + 'e' + '9' * (length - 129),
+        '0x' + 'f' * (length - 2),
+        '1/' + '3' * (length - 2),
+        '[' + '1,' * half + ']',
+        '(' + '1,' * half + ')',
+        '{' + '1,' * half + '}',
+        '{' + ','.join(f'{k}:{k}' for k in range(length // 6)) + '}',
+        "'" + 'a' * (length - 2) + "'",
+        '1j**' + '9' * (length - 4),
+        'sqrt(' * ((length - 1) // 6) + '2' + ')' * ((length - 1) // 6),
+        'exp(exp(exp(exp(99))))',
+        'Matrix([[x]*99]*99)**99',
+    ]
+    return [value[:length] for value in inputs if value]
+
+
+def random_inputs(count, length=None, seed=None):
+    if length is None:
+        length = config.maximum_input_length
+    rng = random.Random(seed)
+    for _ in range(count):
+        value = ''
+        target = rng.randint(1, length)
+        while len(value) < target:
+            value += rng.choice(tokens)
+        yield value[:length]
+
+
+def evaluate(dtype, value):
+    # Run the validation pipeline of 'TypeChecked' stage by stage.
+    timings = {}
+    outcome = 'ok'
+    try:
+        for stage in stages:
+            start = time.perf_counter()
+            try:
+                result = getattr(dtype, stage)(value)
+            finally:
+                timings[stage] = time.perf_counter() - start
+            if stage == 'parse' and result is None:
+                break
+            if stage != 'check_type':
+                value = result
+    except ValidationError:
+        outcome = 'invalid'
+    except MemoryError:
+        outcome = 'memory'
+    except RecursionError:
+        outcome = 'recursion'
+    except Exception as e:
+        outcome = f'error: {type(e).__name__}: {e}'[:200]
+    return timings, outcome
+
+
+def worker(conn, targets, memory_limit):
+    if memory_limit is not None and resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        index, value = request
+        conn.send(evaluate(targets[index][1], value))
+
+
+class ParseFuzzer:
+
+    def __init__(
+        self, targets, threshold=None, timeout=None, memory_limit=None
+    ):
+        if threshold is None:
+            threshold = config.fuzz_latency_threshold
+        if timeout is None:
+            timeout = config.fuzz_timeout
+        if memory_limit is None:
+            memory_limit = config.fuzz_memory_limit
+        self.targets = list(targets)
+        self.threshold = threshold
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.process = None
+        self.conn = None
+        if 'fork' in multiprocessing.get_all_start_methods():
+            self.context = multiprocessing.get_context('fork')
+        else:
+            self.context = multiprocessing.get_context('spawn')
+
+    @staticmethod
+    def default_targets():
+        def subclasses(cls):
+            for subclass in cls.__subclasses__():
+                yield subclass
+                yield from subclasses(subclass)
+
+        for cls in subclasses(dtypes.DType):
+            yield cls.__name__, cls(**default_kwargs.get(cls, {}))
+
+    @staticmethod
+    def targets_from_pool(pool):
+        # Data types with the same configuration are shared instances.
+        targets = {}
+        for exercise in pool:
+            pexercise = ParametrizedExercise(exercise)
+            for name, ifield in pexercise.ifields.items():
+                dtype = ifield.dtype
+                if dtype is None:
+                    continue
+                label = (
+                    f'{exercise.__class__.__name__}.{name} '
+                    f'({type(dtype).__name__})'
+                )
+                targets.setdefault(dtype, (label, dtype))
+        return list(targets.values())
+
+    def start_worker(self):
+        self.conn, child_conn = self.context.Pipe()
+        self.process = self.context.Process(
+            target=worker, args=(child_conn, self.targets, self.memory_limit),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def stop_worker(self):
+        if self.process is None:
+            return
+        if self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(1)
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join()
+        self.conn.close()
+        self.process, self.conn = None, None
+
+    def run_input(self, index, value):
+        # Pathological inputs may hang or exhaust memory, so they are run in
+        # a worker process which is replaced if it does not answer in time.
+        if self.process is None:
+            self.start_worker()
+        start = time.perf_counter()
+        self.conn.send((index, value))
+        try:
+            if self.conn.poll(self.timeout):
+                timings, outcome = self.conn.recv()
+                return timings, outcome, sum(timings.values())
+            outcome = 'timeout'
+        except EOFError:
+            outcome = 'crash'
+        latency = time.perf_counter() - start
+        self.process.kill()
+        self.process.join()
+        self.stop_worker()
+        return {}, outcome, latency
+
+    def fuzz(self, count=100, seed=None):
+        records = []
+        try:
+            for index, (label, _) in enumerate(self.targets):
+                inputs = adversarial_inputs()
+                inputs += random_inputs(count, seed=seed)
+                for value in inputs:
+                    timings, outcome, latency = self.run_input(index, value)
+                    records.append({
+                        'dtype': label,
+                        'input': value,
+                        'outcome': outcome,
+                        'timings': timings,
+                        'latency': latency,
+                        'flagged': (
+                            latency > self.threshold or
+                            outcome not in ('ok', 'invalid')
+                        ),
+                    })
+        finally:
+            self.stop_worker()
+        return records
+
+    @staticmethod
+    def write_report(records, path):
+        with open(path, 'w') as file:
+            json.dump(records, file, indent=1)
+
+    def summary(self, records):
+        lines = []
+        for label, _ in self.targets:
+            dtype_records = [
+                record for record in records if record['dtype'] == label
+            ]
+            if not dtype_records:
+                continue
+            latencies = [record['latency'] for record in dtype_records]
+            p50, p90, p99 = numpy.percentile(latencies, (50, 90, 99)) * 1000
+            lines.append(
+                f'{label}: {len(latencies)} inputs, p50 {p50:.2f} ms, '
+                f'p90 {p90:.2f} ms, p99 {p99:.2f} ms, '
+                f'max {max(latencies) * 1000:.2f} ms'
+            )
+            stage_p99 = []
+            for stage in stages:
+                timings = [
+                    record['timings'][stage] for record in dtype_records
+                    if stage in record['timings']
+                ]
+                if timings:
+                    p99 = numpy.percentile(timings, 99) * 1000
+                    stage_p99.append(f'{stage} {p99:.2f} ms')
+            lines.append(f"  p99 per stage: {', '.join(stage_p99)}")
+        flagged = [record for record in records if record['flagged']]
+        lines.append(
+            f'{len(flagged)} inputs exceed {self.threshold * 1000:.0f} ms or '
+            f'fail unexpectedly:'
+        )
+        flagged.sort(key=lambda record: record['latency'], reverse=True)
+        for record in flagged:
+            value = record['input']
+            if len(value) > 60:
+                value = value[:57] + '...'
+            lines.append(
+                f"  {record['latency'] * 1000:9.1f} ms  {record['dtype']}  "
+                f"{record['outcome']}  {value!r}"
+            )
+        return '\n'.join(lines)
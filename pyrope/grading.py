@@ -0,0 +1,246 @@
+from concurrent.futures import (
+    FIRST_COMPLETED, ProcessPoolExecutor, wait
+)
+import json
+import os
+import time
+
+import numpy
+
+from pyrope import examples
+from pyrope.core import ExercisePool, ParametrizedExercise
+from pyrope.server import ExerciseService
+
+
+# Exercises loaded once per worker process.
+_exercises = {}
+
+
+def load_exercises(filepaths):
+    pool = ExercisePool()
+    if not filepaths:
+        pool.add_exercises_from_module(examples)
+    else:
+        for path in filepaths:
+            pool.add_exercises_from_file(path)
+    _exercises.clear()
+    _exercises.update({
+        exercise.__class__.__name__: exercise for exercise in pool
+    })
+
+
+def parametrization_key(name, record):
+    # Records without explicit parameters are parametrized by their seed and
+    # global parameters.
+    if 'parameters' in record:
+        return None
+    return json.dumps(
+        [name, record.get('seed'), record.get('global_parameters')],
+        sort_keys=True, default=str
+    )
+
+
+def grade_record(exercise, record, shared_parameters=None):
+    pexercise = ParametrizedExercise(
+        exercise, record.get('global_parameters'), seed=record.get('seed')
+    )
+    if 'parameters' in record:
+        pexercise.parameters = record['parameters']
+    elif shared_parameters is not None:
+        pexercise.attach_parameters(shared_parameters)
+    errors = ExerciseService.apply_answers(
+        pexercise, record.get('answers', {})
+    )
+    return {
+        'scores': pexercise.scores,
+        'max_scores': pexercise.max_scores,
+        'total_score': pexercise.total_score,
+        'max_total_score': pexercise.max_total_score,
+        'correct': pexercise.correct,
+        'errors': errors,
+    }
+
+
+def grade_batch(name, batch, shared_parameters=None):
+    results = []
+    exercise = _exercises.get(name)
+    if shared_parameters is None:
+        shared_parameters = {}
+    for index, record in batch:
+        start = time.perf_counter()
+        result = {'exercise': name}
+        if 'id' in record:
+            result['id'] = record['id']
+        if exercise is None:
+            result['error'] = f"Unknown exercise '{name}'."
+        else:
+            try:
+                result |= grade_record(
+                    exercise, record,
+                    shared_parameters.get(parametrization_key(name, record))
+                )
+            except Exception as e:
+                result['error'] = f'{type(e).__name__}: {e}'
+        results.append((index, result, time.perf_counter() - start))
+    return results
+
+
+class Grader:
+
+    def __init__(self, filepaths=(), jobs=None, batch_size=16):
+        if jobs is None:
+            jobs = os.cpu_count() or 1
+        if not isinstance(jobs, int) or jobs < 1:
+            raise ValueError("'jobs' has to be a positive integer.")
+        if not isinstance(batch_size, int) or batch_size < 1:
+            raise ValueError("'batch_size' has to be a positive integer.")
+        self.filepaths = tuple(filepaths)
+        self.jobs = jobs
+        self.batch_size = batch_size
+        self.max_in_flight = 2 * jobs
+        self.latencies = []
+        self.parametrizations = {}
+        self.seen = set()
+
+    @staticmethod
+    def read_records(file):
+        lines = (line for line in file if line.strip())
+        for index, line in enumerate(lines):
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError('A record has to be a JSON object.')
+                if 'exercise' not in record:
+                    raise ValueError("A record needs an 'exercise' name.")
+            except ValueError as e:
+                yield index, e
+            else:
+                yield index, record
+
+    def batches(self, records):
+        # Group records by exercise so that workers grade runs of the same
+        # exercise. Records of rarely occurring exercises must not be held
+        # back for too long, because results are written in input order.
+        groups = {}
+        pending = 0
+        for index, record in records:
+            if isinstance(record, Exception):
+                yield None, [(index, record)]
+                continue
+            name = record['exercise']
+            groups.setdefault(name, []).append((index, record))
+            pending += 1
+            if len(groups[name]) >= self.batch_size:
+                pending -= len(groups[name])
+                yield name, groups.pop(name)
+            elif pending >= self.batch_size * self.max_in_flight:
+                name = min(groups, key=lambda name: groups[name][0][0])
+                pending -= len(groups[name])
+                yield name, groups.pop(name)
+        for name, batch in groups.items():
+            yield name, batch
+
+    def share_parameters(self, name, batch):
+        # Records with the same seed and global parameters, e.g. of an exam
+        # with a fixed seed, would be parametrized by every worker. From
+        # their second record on, they are parametrized once here instead and
+        # large arrays in their parameters are sent as shared memory handles.
+        # The parametrizations are kept until grading finishes, so that the
+        # shared memory stays attachable.
+        shared = {}
+        for _, record in batch:
+            key = parametrization_key(name, record)
+            if key is None:
+                continue
+            if key not in self.seen:
+                self.seen.add(key)
+                continue
+            if key not in self.parametrizations:
+                if not _exercises:
+                    load_exercises(self.filepaths)
+                pexercise = None
+                if name in _exercises:
+                    try:
+                        # The global parameters of the record are completed
+                        # with defaults in place, which would change its key.
+                        pexercise = ParametrizedExercise(
+                            _exercises[name],
+                            dict(record.get('global_parameters') or {}),
+                            seed=record.get('seed')
+                        )
+                        if pexercise.share_arrays() == 0:
+                            pexercise = None
+                    except Exception:
+                        # Errors are reported by the worker.
+                        pexercise = None
+                self.parametrizations[key] = pexercise
+            if self.parametrizations[key] is not None:
+                shared[key] = self.parametrizations[key].parameters
+        return shared
+
+    def grade(self, input_path, output_path):
+        start = time.perf_counter()
+        results = {}
+        next_index = 0
+        count = 0
+
+        def collect(futures):
+            for future in futures:
+                for index, result, latency in future.result():
+                    results[index] = result
+                    self.latencies.append(latency)
+
+        def write_ready(file):
+            nonlocal next_index
+            while next_index in results:
+                result = results.pop(next_index)
+                file.write(json.dumps(result, default=str) + '\n')
+                next_index += 1
+
+        with (
+            open(input_path) as input_file,
+            open(output_path, 'w') as output_file,
+            ProcessPoolExecutor(
+                max_workers=self.jobs, initializer=load_exercises,
+                initargs=(self.filepaths,)
+            ) as executor
+        ):
+            in_flight = set()
+            for name, batch in self.batches(self.read_records(input_file)):
+                if name is None:
+                    index, error = batch[0]
+                    results[index] = {'error': str(error)}
+                else:
+                    if len(in_flight) >= self.max_in_flight:
+                        done, in_flight = wait(
+                            in_flight, return_when=FIRST_COMPLETED
+                        )
+                        collect(done)
+                    in_flight.add(executor.submit(
+                        grade_batch, name, batch,
+                        self.share_parameters(name, batch)
+                    ))
+                    count += len(batch)
+                write_ready(output_file)
+            collect(in_flight)
+            write_ready(output_file)
+        self.parametrizations.clear()
+        self.seen.clear()
+
+        return count, time.perf_counter() - start
+
+    def summary(self, count, duration):
+        lines = [
+            f'Graded {count} submissions in {duration:.2f} s '
+            f'({count / duration:.1f} submissions/s).'
+        ]
+        if self.latencies:
+            p50, p90, p99 = numpy.percentile(
+                self.latencies, (50, 90, 99)
+            ) * 1000
+            lines.append(
+                f'Latency per submission: p50 {p50:.1f} ms, '
+                f'p90 {p90:.1f} ms, p99 {p99:.1f} ms, '
+                f'max {max(self.latencies) * 1000:.1f} ms.'
+            )
+        return '\n'.join(lines)
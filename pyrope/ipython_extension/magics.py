@@ -1,7 +1,6 @@
 
 import shlex
 import types
-import unittest
 
 from IPython.core.magic import (
     line_magic, Magics, magics_class, needs_local_scope
@@ -10,6 +9,7 @@ from IPython.core.magic import (
 from pyrope import examples, ExercisePool, ExerciseRunner
 from pyrope.core import CLIParser
 from pyrope.frontends import ConsoleFrontend, JupyterFrontend
+from pyrope.testing import run_tests_from_args
 
 
 @magics_class
@@ -44,11 +44,4 @@ class PyRopeMagics(Magics):
                 runner.run()
 
         if args.subcommand == 'test':
-            test_cases = [
-                test_case
-                for exercise in pool
-                for test_case in exercise.test_cases()
-            ]
-            suite = unittest.TestSuite(test_cases)
-            runner = unittest.TextTestRunner()
-            runner.run(suite)
+            run_tests_from_args(pool, args)
@@ -0,0 +1,146 @@
+import asyncio
+import os
+import pathlib
+import urllib.parse
+
+from jupyter_server.serverapp import list_running_servers
+from jupyter_server.services.kernels.kernelmanager import (
+    AsyncMappingKernelManager
+)
+from traitlets import Integer, List, Unicode
+
+
+class PooledKernelManager(AsyncMappingKernelManager):
+    """
+    A kernel manager which keeps a pool of started kernels with PyRope and
+    the given exercise files already imported, so that opening an exercise
+    notebook does not wait for a kernel to start.
+    """
+
+    pool_size = Integer(
+        2, config=True, help='Number of pre-started kernels.'
+    )
+
+    preload_files = List(
+        Unicode(), config=True,
+        help='Exercise files imported in pre-started kernels.'
+    )
+
+    def __init__(self, **kwargs):
+        AsyncMappingKernelManager.__init__(self, **kwargs)
+        self.pool = []
+        self.pending = 0
+
+    @property
+    def exec_lines(self):
+        lines = ['import pyrope']
+        for path in self.preload_files:
+            lines.append(
+                f'pyrope.ExercisePool().add_exercises_from_file({path!r})'
+            )
+        return lines
+
+    def fill_pool(self):
+        # The server constructs its kernel manager before it starts its event
+        # loop, so the pool is filled when kernels are requested.
+        while len(self.pool) + self.pending < self.pool_size:
+            self.pending += 1
+            asyncio.ensure_future(self.start_pooled_kernel())
+
+    async def start_pooled_kernel(self):
+        try:
+            kernel_id = await AsyncMappingKernelManager.start_kernel(
+                self, extra_arguments=[
+                    f'--IPKernelApp.exec_lines={line}'
+                    for line in self.exec_lines
+                ]
+            )
+        except Exception as e:
+            self.log.warning(f'Starting a pooled kernel failed: {e}')
+        else:
+            self.pool.append(kernel_id)
+        finally:
+            self.pending -= 1
+
+    async def start_kernel(self, *, kernel_id=None, path=None, **kwargs):
+        kernel_name = kwargs.get('kernel_name')
+        if kernel_id is None and kernel_name in (
+            None, self.default_kernel_name
+        ):
+            kernel_id = await self.pop_pooled_kernel()
+            self.fill_pool()
+            if kernel_id is not None:
+                if path is not None:
+                    await self.change_directory(kernel_id, path)
+                return kernel_id
+        return await AsyncMappingKernelManager.start_kernel(
+            self, kernel_id=kernel_id, path=path, **kwargs
+        )
+
+    async def pop_pooled_kernel(self):
+        # Pooled kernels may have died or been shut down in the meantime.
+        while self.pool:
+            kernel_id = self.pool.pop(0)
+            if kernel_id not in self:
+                continue
+            if await self.get_kernel(kernel_id).is_alive():
+                return kernel_id
+            self.log.warning(f'Pooled kernel {kernel_id} died.')
+            try:
+                await self.shutdown_kernel(kernel_id, now=True)
+            except Exception as e:
+                self.log.warning(f'Shutting down a dead kernel failed: {e}')
+        return None
+
+    async def change_directory(self, kernel_id, path):
+        # Pooled kernels are started in the root directory of the server.
+        cwd = self.cwd_for_path(path)
+        client = self.get_kernel(kernel_id).client()
+        client.start_channels()
+        try:
+            client.execute(
+                f'import os; os.chdir({cwd!r})', silent=True,
+                store_history=False
+            )
+            await client.get_shell_msg(timeout=10)
+        except Exception as e:
+            self.log.warning(f'Changing the kernel directory failed: {e}')
+        finally:
+            client.stop_channels()
+
+
+def server_arguments(pool_size, filepaths):
+    arguments = [
+        '--ServerApp.kernel_manager_class='
+        'pyrope.kernel_pool.PooledKernelManager',
+        f'--PooledKernelManager.pool_size={pool_size}',
+    ]
+    arguments += [
+        f'--PooledKernelManager.preload_files={path}' for path in filepaths
+    ]
+    return arguments
+
+
+def find_running_server(path):
+    # A running server can only open notebooks below its root directory.
+    path = os.path.abspath(path)
+    for server in list_running_servers():
+        root = server.get('root_dir') or server.get('notebook_dir')
+        if not root:
+            continue
+        root = os.path.abspath(root)
+        try:
+            if os.path.commonpath([root, path]) == root:
+                return server
+        except ValueError:
+            continue
+    return None
+
+
+def notebook_url(server, path):
+    root = server.get('root_dir') or server.get('notebook_dir')
+    relpath = pathlib.Path(os.path.relpath(path, root)).as_posix()
+    url = f"{server['url']}notebooks/{urllib.parse.quote(relpath)}"
+    if server.get('token'):
+        url += f"?token={server['token']}"
+    return url
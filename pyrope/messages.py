@@ -24,6 +24,23 @@ class ChangeWidgetAttribute(Message):
         )
 
 
+class ChangeWidgetAttributes(Message):
+
+    def __init__(self, sender, widget_id, attributes):
+        Message.__init__(self, sender)
+        self.widget_id = widget_id
+        self.attributes = attributes
+
+    def __str__(self):
+        return '\n'.join(str(msg) for msg in self.split())
+
+    def split(self):
+        return [
+            ChangeWidgetAttribute(self.sender, self.widget_id, name, value)
+            for name, value in self.attributes.items()
+        ]
+
+
 class CreateWidget(Message):
 
     def __init__(self, sender, widget_id, widget_type):
@@ -52,6 +69,43 @@ class ExerciseAttribute(Message):
         )
 
 
+class MessageBatch(Message):
+
+    def __init__(self, sender, messages):
+        Message.__init__(self, sender)
+        self.messages = messages
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    def __len__(self):
+        return len(self.messages)
+
+    def __str__(self):
+        return '\n'.join(str(msg) for msg in self.messages)
+
+    @classmethod
+    def coalesce(cls, sender, messages):
+        # Consecutive attribute changes are merged into one message per
+        # widget, in which the last value of an attribute wins. Any other
+        # message ends the merging, so that the order of attribute changes
+        # relative to other messages is kept.
+        batch, changes = [], {}
+        for msg in messages:
+            if isinstance(msg, ChangeWidgetAttribute):
+                if msg.widget_id not in changes:
+                    changes[msg.widget_id] = ChangeWidgetAttributes(
+                        msg.sender, msg.widget_id, {}
+                    )
+                    batch.append(changes[msg.widget_id])
+                attributes = changes[msg.widget_id].attributes
+                attributes[msg.attribute_name] = msg.attribute_value
+            else:
+                changes.clear()
+                batch.append(msg)
+        return cls(sender, batch)
+
+
 class RenderTemplate(Message):
 
     def __init__(self, sender, template_type, template):
@@ -43,6 +43,16 @@ class Problem(Node):
             for name, ifield in self.ifields.items()
         ) / len(self.ifields)
 
+    def compare_many(self, values, reference):
+        values = list(values)
+        return sum(
+            ifield.compare_many(
+                [None if value is None else value[name] for value in values],
+                reference[name]
+            )
+            for name, ifield in self.ifields.items()
+        ) / len(self.ifields)
+
 
 class Boolean(Node):
 
@@ -3,6 +3,8 @@ from copy import deepcopy
 from functools import cached_property
 from uuid import uuid4
 
+import numpy as np
+
 from pyrope.dtypes import TypeChecked
 from pyrope.errors import ValidationError
 from pyrope.formatters import TemplateFormatter
@@ -12,7 +14,7 @@ from pyrope.messages import WidgetValidationError
 class Node:
 
     dtype = None
-    value = TypeChecked()
+    value = TypeChecked(memoize=True)
 
     a_solution = TypeChecked()
     the_solution = TypeChecked()
@@ -21,6 +23,7 @@ class Node:
     def __init__(self, template, ifields, **kwargs):
         self.ID = uuid4()
         self.parent = None
+        self.memoized = {}
 
         for name, ifield in ifields.items():
             if not isinstance(ifield, Node):
@@ -30,11 +33,7 @@ class Node:
         ifields = {
             name: ifield.clone() for name, ifield in ifields.items()
         }
-        names = tuple(
-            name
-            for _, name, _ in TemplateFormatter.parse(template)
-            if name is not None
-        )
+        names = TemplateFormatter.compile(template).field_names
         for name in ifields:
             if name in names:
                 ifields[name].parent = self
@@ -64,6 +63,14 @@ class Node:
         values = list(self.parent.ifields.values())
         return keys[values.index(self)]
 
+    def invalidate(self):
+        # Memoized values of a node depend on the widgets below it, so they
+        # are discarded along the chain of ancestors of a changed widget.
+        node = self
+        while node is not None:
+            node.memoized.clear()
+            node = node.parent
+
     def validate(self):
         try:
             value = self.value
@@ -197,6 +204,14 @@ class Node:
             return LHS == RHS
         return self.dtype.compare(LHS, RHS)
 
+    def compare_many(self, values, reference):
+        if self.dtype is None:
+            return np.array(
+                [value is not None and value == reference for value in values],
+                float
+            )
+        return self.dtype.compare_many(values, reference)
+
     def clone(self):
         clone = deepcopy(self)
         self.reset_IDs()
@@ -30,10 +30,22 @@ class NotifyingAttribute:
         ))
 
 
+def notifying_attributes(cls):
+    return tuple(
+        obj for _, obj in inspect.getmembers(cls)
+        if isinstance(obj, NotifyingAttribute)
+    )
+
+
 class Widget(Node):
 
     description = NotifyingAttribute()
 
+    def __init_subclass__(cls):
+        # The notifying attributes are collected once per class instead of
+        # once per widget.
+        cls.notifying_attributes = notifying_attributes(cls)
+
     def __init__(self, description=''):
         if not isinstance(description, str):
             raise ValueError("'description' has to be a string.")
@@ -69,9 +81,8 @@ class Widget(Node):
             observer(msg)
 
     def observe_attributes(self):
-        for _, obj in inspect.getmembers(self.__class__):
-            if isinstance(obj, NotifyingAttribute):
-                obj.notify(self)
+        for obj in self.notifying_attributes:
+            obj.notify(self)
 
     def validate(self):
         if self.parent.value is None:
@@ -89,6 +100,7 @@ class Widget(Node):
             equal = equal.all()
         if not equal:
             self._value = value
+            self.invalidate()
             self.notify(ChangeWidgetAttribute(
                 repr(self), self.ID, 'value', value
             ))
@@ -103,6 +115,20 @@ class Widget(Node):
     def valid(self):
         return self._valid
 
+    @property
+    def validation_error(self):
+        # The error of the lowest input field above this widget whose value
+        # is invalid, which 'Node.validate' reports for invalid widgets.
+        ifield = self.parent
+        while ifield is not None and ifield.parent is not None:
+            try:
+                ifield.value
+            except ValidationError as e:
+                e.ifield = ifield
+                return e
+            ifield = ifield.parent
+        return None
+
     @valid.setter
     def valid(self, value):
         if value != self._valid:
@@ -324,6 +350,9 @@ class Widget(Node):
             ))
 
 
+Widget.notifying_attributes = notifying_attributes(Widget)
+
+
 class Checkbox(Widget):
 
     def __init__(self, **kwargs):
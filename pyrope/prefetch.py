@@ -0,0 +1,175 @@
+import collections
+import logging
+import random
+import threading
+import time
+
+from pyrope import config
+from pyrope.core import ParametrizedExercise
+
+
+logger = logging.getLogger('pyrope')
+
+
+class PrefetchPool:
+    """
+    Fully evaluated parametrizations of exercises, which a background thread
+    keeps ready. They are handed out to exercise runners created with the
+    pool as 'prefetch', e.g. by the exercise server or by 'Exercise.run'.
+    Statistics are keyed by exercise class names.
+    """
+
+    # Exercises whose parametrization failed are retried after a delay in
+    # seconds which doubles with every further failure.
+    retry_delay = 1.0
+    maximum_retry_delay = 60.0
+
+    def __init__(self, size=None, sizes=None):
+        if size is None:
+            size = config.prefetch_size
+        if sizes is None:
+            sizes = config.prefetch_sizes
+        self.size = size
+        self.sizes = dict(sizes)
+        self.exercises = {}
+        self.queues = {}
+        self.difficulties = {}
+        self.hits = collections.Counter()
+        self.misses = collections.Counter()
+        self.failures = collections.Counter()
+        self.retries = {}
+        self.condition = threading.Condition()
+        self.thread = None
+        self.stopped = False
+
+    def add_exercise(self, exercise, size=None):
+        name = exercise.__class__.__name__
+        if size is None:
+            size = self.sizes.get(name, self.size)
+        if not isinstance(size, int) or size < 0:
+            raise ValueError(
+                f"The prefetch size has to be a non-negative integer, got "
+                f"{size}."
+            )
+        with self.condition:
+            self.exercises[exercise] = size
+            self.queues[exercise] = collections.deque()
+            self.difficulties[exercise] = exercise.difficulty
+            self.condition.notify()
+
+    def add_exercises_from_pool(self, pool):
+        for exercise in pool:
+            self.add_exercise(exercise)
+
+    def start(self):
+        if self.thread is None:
+            self.stopped = False
+            self.thread = threading.Thread(target=self.refill, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def get(self, exercise, global_parameters=None, seed=None):
+        # Prefetched exercises are parametrized with a random seed and
+        # default global parameters only.
+        name = exercise.__class__.__name__
+        with self.condition:
+            queue = self.queues.get(exercise)
+            if queue is None:
+                return None
+            if self.difficulties[exercise] != exercise.difficulty:
+                self.difficulties[exercise] = exercise.difficulty
+                queue.clear()
+            if queue and global_parameters is None and seed is None:
+                self.hits[name] += 1
+                self.condition.notify()
+                return queue.popleft()
+            self.misses[name] += 1
+            return None
+
+    def statistics(self):
+        statistics = {}
+        for exercise, size in self.exercises.items():
+            name = exercise.__class__.__name__
+            hits, misses = self.hits[name], self.misses[name]
+            statistics[name] = {
+                'size': size,
+                'prefetched': len(self.queues[exercise]),
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': hits / (hits + misses) if hits + misses else None,
+                'failures': self.failures[name],
+            }
+        return statistics
+
+    @staticmethod
+    def evaluate(pexercise):
+        pexercise.parameters
+        pexercise.template
+        pexercise.preamble
+        pexercise.hints
+        pexercise.solution
+        pexercise.max_total_score
+        pexercise.trivial_input
+        pexercise.dummy_input
+        return pexercise
+
+    def next_exercise(self):
+        now = time.monotonic()
+        for exercise, size in self.exercises.items():
+            if self.retries.get(exercise, now) > now:
+                continue
+            if len(self.queues[exercise]) < size:
+                return exercise
+        return None
+
+    def next_retry(self):
+        # Seconds until the retry of a failed exercise is due, None if no
+        # retry is pending.
+        delays = [
+            retry - time.monotonic()
+            for exercise, retry in self.retries.items()
+            if len(self.queues[exercise]) < self.exercises[exercise]
+        ]
+        if not delays:
+            return None
+        return max(min(delays), 0.0)
+
+    def refill(self):
+        while True:
+            with self.condition:
+                while not self.stopped and self.next_exercise() is None:
+                    self.condition.wait(self.next_retry())
+                if self.stopped:
+                    return
+                exercise = self.next_exercise()
+                difficulty = exercise.difficulty
+            try:
+                pexercise = self.evaluate(ParametrizedExercise(
+                    exercise, seed=random.getrandbits(64)
+                ))
+            except Exception as e:
+                name = exercise.__class__.__name__
+                with self.condition:
+                    self.failures[name] += 1
+                    delay = min(
+                        self.retry_delay * 2 ** (self.failures[name] - 1),
+                        self.maximum_retry_delay
+                    )
+                    self.retries[exercise] = time.monotonic() + delay
+                logger.warning(
+                    f'Prefetching exercise {name} failed, retrying in '
+                    f'{delay:g} s: {e}', exc_info=True
+                )
+                continue
+            with self.condition:
+                self.failures.pop(exercise.__class__.__name__, None)
+                self.retries.pop(exercise, None)
+                if self.difficulties.get(exercise) == difficulty:
+                    self.queues[exercise].append(pexercise)
@@ -0,0 +1,93 @@
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger('pyrope')
+
+
+class ValidationScheduler:
+    """
+    Validates widget values sent by a frontend in a background thread. A
+    value is validated as soon as no newer value of the same widget arrived
+    for 'delay' seconds. Values which are superseded before or during their
+    validation do not produce any messages.
+    """
+
+    def __init__(self, runner, delay):
+        if not isinstance(delay, (int, float)) or delay < 0:
+            raise ValueError(
+                f"'delay' has to be a non-negative number, got {delay}."
+            )
+        self.runner = runner
+        self.delay = delay
+        self.pending = {}
+        self.generations = {}
+        self.condition = threading.Condition()
+        self.thread = None
+        self.stopped = False
+
+    def start(self):
+        if self.thread is None:
+            self.stopped = False
+            self.thread = threading.Thread(target=self.work, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def submit(self, widget_id, value):
+        self.start()
+        with self.condition:
+            generation = self.generations.get(widget_id, 0) + 1
+            self.generations[widget_id] = generation
+            deadline = time.monotonic() + self.delay
+            self.pending[widget_id] = (deadline, generation, value)
+            self.condition.notify()
+
+    def superseded(self, widget_id, generation):
+        with self.condition:
+            return self.generations[widget_id] != generation
+
+    def flush(self):
+        # Pending values are validated at once in the calling thread, e.g.
+        # before the exercise is submitted.
+        with self.condition:
+            pending, self.pending = self.pending, {}
+        for widget_id, (_, generation, value) in pending.items():
+            self.apply(widget_id, generation, value)
+
+    def apply(self, widget_id, generation, value):
+        try:
+            self.runner.apply_value(
+                widget_id, value,
+                superseded=lambda: self.superseded(widget_id, generation)
+            )
+        except Exception as e:
+            logger.warning(f'Validating widget {widget_id} failed: {e}')
+
+    def next_due(self):
+        # The widget whose value is due next and the seconds until then.
+        widget_id = min(self.pending, key=lambda ID: self.pending[ID][0])
+        return widget_id, self.pending[widget_id][0] - time.monotonic()
+
+    def work(self):
+        while True:
+            with self.condition:
+                while not self.stopped:
+                    if not self.pending:
+                        self.condition.wait()
+                        continue
+                    widget_id, timeout = self.next_due()
+                    if timeout <= 0:
+                        break
+                    self.condition.wait(timeout)
+                if self.stopped:
+                    return
+                _, generation, value = self.pending.pop(widget_id)
+            self.apply(widget_id, generation, value)
@@ -0,0 +1,300 @@
+import json
+import logging
+import os
+import random
+import signal
+import socket
+import time
+from collections import OrderedDict
+from uuid import uuid4
+
+import numpy
+
+from pyrope import config
+from pyrope.core import ParametrizedExercise
+from pyrope.errors import ValidationError
+from pyrope.prefetch import PrefetchPool
+
+
+logger = logging.getLogger('pyrope')
+
+
+class ExerciseService:
+
+    def __init__(self, exercises, prefetch=None, max_exercises=None):
+        if max_exercises is None:
+            max_exercises = config.server_max_exercises
+        if not isinstance(max_exercises, int) or max_exercises < 1:
+            raise ValueError("'max_exercises' has to be a positive integer.")
+        self.exercises = exercises
+        # Parametrized exercises ordered from least to most recently used.
+        self.pexercises = OrderedDict()
+        self.prefetch = prefetch
+        self.max_exercises = max_exercises
+
+    def handle(self, request):
+        try:
+            action = request['action']
+            handler = getattr(self, f'do_{action}', None)
+            if handler is None:
+                raise ValueError(f"Unknown action '{action}'.")
+            response = handler(request)
+        except Exception as e:
+            return {'status': 'error', 'error': f'{type(e).__name__}: {e}'}
+        return {'status': 'ok'} | response
+
+    def pexercise(self, request):
+        token = request['token']
+        try:
+            pexercise = self.pexercises[token]
+        except KeyError:
+            raise KeyError(f"Unknown token '{token}'.")
+        self.pexercises.move_to_end(token)
+        return pexercise
+
+    @staticmethod
+    def apply_answers(pexercise, answers):
+        errors = {}
+        for name, value in answers.items():
+            if name not in pexercise.ifields:
+                errors[name] = f"There is no input field '{name}'."
+                continue
+            ifield = pexercise.ifields[name]
+            ifield.value = None
+            try:
+                ifield.value = value
+            except ValidationError as e:
+                errors[name] = str(e)
+        return errors
+
+    def do_parametrize(self, request):
+        name = request['exercise']
+        try:
+            exercise = self.exercises[name]
+        except KeyError:
+            raise KeyError(f"Unknown exercise '{name}'.")
+        global_parameters = request.get('global_parameters')
+        seed = request.get('seed')
+        pexercise = None
+        if self.prefetch is not None:
+            pexercise = self.prefetch.get(exercise, global_parameters, seed)
+        if pexercise is None:
+            pexercise = ParametrizedExercise(
+                exercise, global_parameters, seed=seed
+            )
+        token = uuid4().hex
+        self.pexercises[token] = pexercise
+        # Clients which do not close their exercises must not exhaust the
+        # memory of the worker.
+        while len(self.pexercises) > self.max_exercises:
+            self.pexercises.popitem(last=False)
+        return {
+            'token': token,
+            'seed': pexercise.seed,
+            'parameters': pexercise.parameters,
+            'preamble': pexercise.preamble,
+            'template': pexercise.template,
+            'ifields': {
+                name: [str(widget.ID) for widget in ifield.widgets]
+                for name, ifield in pexercise.ifields.items()
+            },
+            'max_total_score': pexercise.max_total_score,
+        }
+
+    def do_validate(self, request):
+        pexercise = self.pexercise(request)
+        errors = self.apply_answers(pexercise, request.get('answers', {}))
+        return {'answers': pexercise.answers, 'errors': errors}
+
+    def do_score(self, request):
+        pexercise = self.pexercise(request)
+        errors = self.apply_answers(pexercise, request.get('answers', {}))
+        return {
+            'answers': pexercise.answers,
+            'errors': errors,
+            'scores': pexercise.scores,
+            'max_scores': pexercise.max_scores,
+            'total_score': pexercise.total_score,
+            'max_total_score': pexercise.max_total_score,
+            'correct': pexercise.correct,
+            'feedback': pexercise.feedback,
+        }
+
+    def do_close(self, request):
+        self.pexercises.pop(request['token'], None)
+        return {}
+
+    def do_statistics(self, request):
+        if self.prefetch is None:
+            return {'prefetch': {}}
+        return {'prefetch': self.prefetch.statistics()}
+
+
+class ExerciseServer:
+
+    def __init__(
+        self, pool, socket_path=None, workers=None, max_requests=None
+    ):
+        if not hasattr(os, 'fork'):
+            raise OSError('The exercise server needs a POSIX system.')
+        if socket_path is None:
+            socket_path = config.server_socket
+        if workers is None:
+            workers = config.server_workers
+        if max_requests is None:
+            max_requests = config.server_max_requests
+        if not isinstance(workers, int) or workers < 1:
+            raise ValueError("'workers' has to be a positive integer.")
+        if not isinstance(max_requests, int) or max_requests < 1:
+            raise ValueError("'max_requests' has to be a positive integer.")
+        # Requests refer to exercises by their class names.
+        self.exercises = {}
+        for exercise in pool:
+            name = exercise.__class__.__name__
+            if name in self.exercises:
+                raise ValueError(
+                    f"The pool contains several exercises named '{name}'."
+                )
+            self.exercises[name] = exercise
+        self.socket_path = socket_path
+        self.workers = workers
+        self.max_requests = max_requests
+        self.socket = None
+        self.pids = set()
+
+    def warm_up(self):
+        # Load lazily imported modules and fill caches before forking, so
+        # that all workers share these pages copy-on-write.
+        for name, exercise in self.exercises.items():
+            try:
+                pexercise = ParametrizedExercise(exercise)
+                pexercise.template
+                pexercise.max_total_score
+            except Exception as e:
+                logger.warning(f'Warming up exercise {name} failed: {e}')
+
+    def serve_forever(self):
+        self.warm_up()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.bind(self.socket_path)
+        self.socket.listen()
+        signal.signal(signal.SIGTERM, self.shutdown)
+        logger.info(
+            f'Serving {len(self.exercises)} exercises on {self.socket_path} '
+            f'with {self.workers} workers.'
+        )
+        try:
+            for _ in range(self.workers):
+                self.spawn_worker()
+            while self.pids:
+                pid, status = os.wait()
+                if pid in self.pids:
+                    self.pids.remove(pid)
+                    code = os.waitstatus_to_exitcode(status)
+                    if code != 0:
+                        # Workers failing on start must not be replaced in
+                        # a tight loop.
+                        logger.warning(
+                            f'Worker {pid} exited with status {code} and is '
+                            f'replaced in a second.'
+                        )
+                        time.sleep(1)
+                    self.spawn_worker()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+    def shutdown(self, *args):
+        for pid in self.pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        self.pids = set()
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def spawn_worker(self):
+        pid = os.fork()
+        if pid != 0:
+            self.pids.add(pid)
+            return
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        # Forked workers inherit the random state of the server.
+        random.seed()
+        numpy.random.seed()
+        status = 1
+        try:
+            self.work()
+            status = 0
+        except BaseException:
+            logger.exception(f'Worker {os.getpid()} failed.')
+        finally:
+            os._exit(status)
+
+    def work(self):
+        # A connection is bound to a single worker, so parametrized exercises
+        # are kept per connection. A worker closes its connection and exits
+        # as soon as it has answered 'max_requests' requests.
+        prefetch = PrefetchPool()
+        for exercise in self.exercises.values():
+            prefetch.add_exercise(exercise)
+        prefetch.start()
+        handled = 0
+        while handled < self.max_requests:
+            conn, _ = self.socket.accept()
+            with conn, conn.makefile('rwb') as stream:
+                service = ExerciseService(self.exercises, prefetch)
+                try:
+                    for line in stream:
+                        try:
+                            request = json.loads(line)
+                        except json.JSONDecodeError as e:
+                            response = {'status': 'error', 'error': str(e)}
+                        else:
+                            response = service.handle(request)
+                        stream.write(
+                            json.dumps(response, default=str).encode() + b'\n'
+                        )
+                        stream.flush()
+                        handled += 1
+                        if handled >= self.max_requests:
+                            break
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+
+class ExerciseClient:
+
+    def __init__(self, socket_path=None):
+        if socket_path is None:
+            socket_path = config.server_socket
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(socket_path)
+        self.stream = self.socket.makefile('rwb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def request(self, action, **kwargs):
+        request = {'action': action} | kwargs
+        self.stream.write(json.dumps(request, default=str).encode() + b'\n')
+        self.stream.flush()
+        line = self.stream.readline()
+        if not line:
+            raise ConnectionError('The server closed the connection.')
+        return json.loads(line)
+
+    def close(self):
+        self.stream.close()
+        self.socket.close()
@@ -0,0 +1,97 @@
+from multiprocessing import shared_memory
+import os
+
+import numpy
+
+try:
+    from numpy.lib.array_utils import byte_bounds
+except ImportError:
+    from numpy import byte_bounds
+
+
+# Names of blocks unlinked by this process. Arrays in such blocks can no
+# longer be attached to and are pickled by value.
+unlinked = set()
+
+
+class SharedMemory(shared_memory.SharedMemory):
+
+    def __del__(self):
+        # Arrays keep the mapped memory alive via the buffer they were
+        # created from, so the mapping must not be closed together with this
+        # object. Only the file descriptor is released.
+        fd = getattr(self, '_fd', -1)
+        if fd >= 0:
+            os.close(fd)
+            self._fd = -1
+
+
+class SharedArray(numpy.ndarray):
+    """
+    A NumPy array in a shared memory block. It is pickled as a handle to the
+    block, so that other processes attach to it instead of copying it.
+    """
+
+    def __array_finalize__(self, obj):
+        self.block_name = getattr(obj, 'block_name', None)
+        self.block_address = getattr(obj, 'block_address', None)
+        self.block_size = getattr(obj, 'block_size', None)
+
+    def __reduce__(self):
+        # Results of computations with shared arrays are shared arrays as
+        # well, but do not lie in the shared memory block.
+        if self.block_name is not None and self.block_name not in unlinked:
+            low, high = byte_bounds(self)
+            start = self.block_address
+            if start <= low and high <= start + self.block_size:
+                offset = self.__array_interface__['data'][0] - start
+                return attach, (
+                    self.block_name, self.shape, self.dtype, self.strides,
+                    offset
+                )
+        return self.view(numpy.ndarray).__reduce__()
+
+
+def wrap(block, shape, dtype, strides=None, offset=0):
+    array = numpy.ndarray(
+        shape, dtype, buffer=block.buf, offset=offset, strides=strides
+    ).view(SharedArray)
+    array.block_name = block.name
+    array.block_address = numpy.frombuffer(block.buf, numpy.uint8).ctypes.data
+    array.block_size = block.size
+    return array
+
+
+def share(array):
+    array = numpy.asarray(array)
+    if array.dtype.hasobject:
+        raise ValueError('Arrays of Python objects cannot be shared.')
+    block = SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared = wrap(block, array.shape, array.dtype)
+    shared[...] = array
+    return shared, block
+
+
+def attach(name, shape, dtype, strides, offset):
+    # Before Python 3.13, attaching registers the block with the resource
+    # tracker again. This is harmless for processes started by
+    # 'multiprocessing', because they share the tracker of their parent.
+    try:
+        block = SharedMemory(name=name, track=False)
+    except TypeError:
+        block = SharedMemory(name=name)
+    return wrap(block, shape, dtype, strides, offset)
+
+
+def unlink(blocks, pid):
+    # Processes forked from the owner must not unlink its blocks.
+    if os.getpid() != pid:
+        return
+    for block in blocks:
+        if block.name in unlinked:
+            continue
+        unlinked.add(block.name)
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass
@@ -558,9 +558,14 @@ class QuadraticEquation(Exercise):
     #       Use this to allow the runner to make the exercise adaptive.
     #   'user_name': string
     #       The student's name. Used this to personalise the exercise.
-    #   'user_ID': string
-    #       The student's ID. Maybe used for individually reproducible
-    #       parameter randomisation, e.g. via a random seed.
+    #   'seed': int
+    #       The seed of this parametrization. Pass the same seed to the
+    #       runner to reproduce the parameters, e.g. for re-grading.
+    #   'rng': random.Random
+    #   'numpy_rng': numpy.random.Generator
+    #       Random generators seeded with 'seed'. Note that the global
+    #       generators of 'random' and 'numpy.random' are seeded with 'seed'
+    #       as well while this method runs.
     #
     # Note that all instance parameters must have sensible default values,
     # as it can not be assured they are available in every exercise context.
@@ -0,0 +1,599 @@
+import argparse
+import collections
+from datetime import datetime, timedelta
+from hashlib import sha3_256
+import importlib.metadata
+import inspect
+import json
+import logging
+import os
+import pathlib
+import re
+import time
+import unittest
+
+import numpy
+
+from pyrope import config, tests
+
+
+logger = logging.getLogger('pyrope')
+
+
+# Configuration options which influence the verdict of exercise tests.
+cache_relevant_config = (
+    'maximum_test_repetitions',
+    'test_distinct_parameters',
+    'test_input_strength',
+    'test_time_budget',
+)
+
+
+def pyrope_version():
+    # Changes to PyRope itself invalidate cached verdicts, even if the
+    # version number has not been bumped during development.
+    try:
+        version = importlib.metadata.version('pyrope')
+    except importlib.metadata.PackageNotFoundError:
+        version = 'unknown'
+    digest = sha3_256()
+    for path in sorted(pathlib.Path(__file__).parent.rglob('*.py')):
+        digest.update(path.read_bytes())
+    return f'{version}+{digest.hexdigest()[:16]}'
+
+
+memory_address = re.compile(r' at 0x[0-9a-fA-F]+')
+
+
+def stable_representation(value, depth=0):
+    """
+    A JSON serializable representation of a value which is the same in every
+    process, unlike default representations of objects, which contain their
+    memory addresses. Objects without a representation of their own are
+    represented by their classes and attributes, functions and classes by
+    their qualified names.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    name = f'{type(value).__module__}.{type(value).__qualname__}'
+    # Reference cycles are cut off.
+    if depth > 16:
+        return name
+    if isinstance(value, (list, tuple)):
+        return [name] + [
+            stable_representation(item, depth + 1) for item in value
+        ]
+    if isinstance(value, (set, frozenset)):
+        return [name] + sorted(
+            (stable_representation(item, depth + 1) for item in value),
+            key=json.dumps
+        )
+    if isinstance(value, dict):
+        return [name] + sorted(
+            (
+                [
+                    stable_representation(key, depth + 1),
+                    stable_representation(item, depth + 1)
+                ]
+                for key, item in value.items()
+            ),
+            key=json.dumps
+        )
+    if isinstance(value, numpy.ndarray):
+        if value.dtype.hasobject:
+            data = stable_representation(value.tolist(), depth + 1)
+        else:
+            data = sha3_256(numpy.ascontiguousarray(value)).hexdigest()
+        return [name, str(value.dtype), list(value.shape), data]
+    if isinstance(value, type) or inspect.isroutine(value):
+        return f'{value.__module__}.{value.__qualname__}'
+    if type(value).__repr__ is object.__repr__:
+        return [name, stable_representation(
+            getattr(value, '__dict__', None), depth + 1
+        )]
+    # Representations can still contain default ones, e.g. of the function
+    # of a 'functools.partial' object.
+    return memory_address.sub('', repr(value))
+
+
+class TestResultCache:
+
+    def __init__(self, path=None):
+        if path is None:
+            path = config.test_cache_file
+        self.path = path
+        self.version = pyrope_version()
+        self.entries = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as file:
+                entries = json.load(file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f'Ignoring test result cache {self.path}: {e}')
+            return
+        if isinstance(entries, dict):
+            self.entries = entries
+
+    def save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(self.entries, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def key(self, exercise):
+        exercise_id = exercise.exercise_id()
+        if exercise_id is None:
+            return None
+        key = {
+            'id': exercise_id,
+            'version': self.version,
+            # Instances of the same class can differ in their constructor
+            # arguments.
+            'attributes': stable_representation(vars(exercise)),
+            'weights': stable_representation(exercise.weights),
+            'difficulty': stable_representation(exercise.difficulty),
+            'config': {
+                name: stable_representation(getattr(config, name))
+                for name in cache_relevant_config
+            },
+        }
+        return sha3_256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+    def passed(self, exercise):
+        key = self.key(exercise)
+        return key is not None and key in self.entries
+
+    def add(self, exercise, timing=None):
+        # Only passing verdicts are cached, failing exercises are always
+        # tested again. The durations of the passing run are kept for
+        # sharding by duration.
+        key = self.key(exercise)
+        if key is not None:
+            self.entries[key] = {
+                'exercise': exercise.__class__.__name__,
+                'passed_at': datetime.now().isoformat(),
+            }
+            if timing is not None:
+                self.entries[key] |= {
+                    'wall': timing['wall'], 'cpu': timing['cpu']
+                }
+
+    def timing(self, exercise):
+        entry = self.entries.get(self.key(exercise), {})
+        if 'wall' not in entry:
+            return None
+        return {
+            'name': entry['exercise'], 'wall': entry['wall'],
+            'cpu': entry['cpu']
+        }
+
+    def clear(self):
+        self.entries = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def prune(self, days):
+        threshold = datetime.now() - timedelta(days=days)
+        pruned = {
+            key: entry for key, entry in self.entries.items()
+            if datetime.fromisoformat(entry['passed_at']) >= threshold
+        }
+        count = len(self.entries) - len(pruned)
+        self.entries = pruned
+        return count
+
+
+class TestCachedVerdict(unittest.TestCase):
+
+    def __init__(self, exercise):
+        unittest.TestCase.__init__(self, 'test_cached_verdict')
+        self.exercise = exercise
+
+    def __str__(self):
+        return f'{self.exercise.__class__.__name__} (cached verdict)'
+
+    def test_cached_verdict(self):
+        self.skipTest('unchanged since the last passing test run')
+
+
+def exercise_key(exercise):
+    # Exercises are identified across runs and shards by their source code.
+    exercise_id = exercise.exercise_id()
+    if exercise_id is None:
+        return exercise.__class__.__name__
+    return exercise_id
+
+
+def test_exercises(test):
+    if isinstance(test, unittest.case._SubTest):
+        test = test.test_case
+    if hasattr(test, 'exercise'):
+        return [test.exercise]
+    if hasattr(test, 'exercises'):
+        return list(test.exercises)
+    if hasattr(test, 'pexercises'):
+        return [pexercise.exercise for pexercise in test.pexercises]
+    return []
+
+
+def exercise_name(test):
+    exercises = test_exercises(test)
+    if not exercises:
+        return None
+    return ', '.join(exercise.__class__.__name__ for exercise in exercises)
+
+
+class TimingTestResult(unittest.TextTestResult):
+
+    def __init__(self, *args, **kwargs):
+        unittest.TextTestResult.__init__(self, *args, **kwargs)
+        self.test_timings = []
+        self.input_timings = []
+        self.evaluated = set()
+        self.parametrizations = {}
+        self.coverages = {}
+        self.cached_timings = {}
+        self.metadata = {}
+        self.started = None
+
+    def startTest(self, test):
+        unittest.TextTestResult.startTest(self, test)
+        self.started = (time.perf_counter(), time.process_time())
+        self.status = 'ok'
+
+    def stopTest(self, test):
+        wall_start, cpu_start = self.started
+        exercises = test_exercises(test)
+        self.test_timings.append({
+            'exercise': exercise_name(test),
+            'key': ', '.join(
+                exercise_key(exercise) for exercise in exercises
+            ) or None,
+            'test': test._testMethodName,
+            'status': self.status,
+            'wall': time.perf_counter() - wall_start,
+            'cpu': time.process_time() - cpu_start,
+        })
+        checked = getattr(test, 'parametrizations_checked', {})
+        for cls, count in checked.items():
+            self.parametrizations[cls.__name__] = count
+        # Input combinations are evaluated once per parametrized exercise
+        # and shared by all tests.
+        for pexercise in getattr(test, 'pexercises', ()):
+            if id(pexercise) in self.evaluated:
+                continue
+            if pexercise not in tests.evaluations:
+                continue
+            self.evaluated.add(id(pexercise))
+            name = pexercise.exercise.__class__.__name__
+            if pexercise in tests.coverages:
+                cases, strength, coverage = tests.coverages[pexercise]
+                self.coverages[name] = {
+                    'cases': cases, 'strength': strength,
+                    'coverage': coverage,
+                }
+            for evaluation in tests.evaluations[pexercise]:
+                self.input_timings.append({
+                    'exercise': name,
+                    'input': repr(evaluation.answers),
+                    'wall': evaluation.wall_time,
+                    'cpu': evaluation.cpu_time,
+                })
+        unittest.TextTestResult.stopTest(self, test)
+
+    def addFailure(self, test, err):
+        unittest.TextTestResult.addFailure(self, test, err)
+        self.status = 'fail'
+
+    def addError(self, test, err):
+        unittest.TextTestResult.addError(self, test, err)
+        self.status = 'error'
+
+    def addSkip(self, test, reason):
+        unittest.TextTestResult.addSkip(self, test, reason)
+        self.status = 'skip'
+
+    def addSubTest(self, test, subtest, err):
+        unittest.TextTestResult.addSubTest(self, test, subtest, err)
+        if err is not None:
+            if issubclass(err[0], test.failureException):
+                self.status = 'fail'
+            else:
+                self.status = 'error'
+
+    @property
+    def exercise_timings(self):
+        # Exercises are keyed like in 'shard_pool'. Skipped tests, e.g. of
+        # cached verdicts, do not tell how long an exercise takes, so
+        # exercises with cached verdicts keep the durations of their last
+        # run.
+        exercises = {}
+        for timing in self.test_timings:
+            if timing['status'] == 'skip':
+                continue
+            totals = exercises.setdefault(timing['key'], {
+                'name': timing['exercise'], 'wall': 0.0, 'cpu': 0.0
+            })
+            totals['wall'] += timing['wall']
+            totals['cpu'] += timing['cpu']
+        return self.cached_timings | exercises
+
+    @property
+    def report(self):
+        return self.metadata | {
+            'version': pyrope_version(),
+            'exercises': self.exercise_timings,
+            'parametrizations': self.parametrizations,
+            'coverages': self.coverages,
+            'tests': sorted(
+                self.test_timings,
+                key=lambda timing: (timing['exercise'], timing['test'])
+            ),
+            'inputs': sorted(
+                self.input_timings,
+                key=lambda timing: (timing['exercise'], timing['input'])
+            ),
+        }
+
+    def write_report(self, path):
+        with open(path, 'w') as file:
+            json.dump(self.report, file, indent=1, sort_keys=True)
+
+    def print_parametrizations(self):
+        # The number of random parametrizations whose maximal total score
+        # was checked depends on the time budget and distinct parameters.
+        counts = self.parametrizations
+        if not counts:
+            return
+        if self.showAll:
+            self.stream.writeln('\nParametrizations checked:')
+            for name, count in sorted(counts.items()):
+                self.stream.writeln(f'{count:8d}  {name}')
+        else:
+            name = min(counts, key=lambda name: (counts[name], name))
+            self.stream.writeln(
+                f'\nMaximal total scores checked for '
+                f'{sum(counts.values())} parametrizations of {len(counts)} '
+                f'exercises, fewest for {name} ({counts[name]}).'
+            )
+        self.stream.flush()
+
+    def print_coverages(self):
+        # Input combinations are chosen to cover all interactions of
+        # 'test_input_strength' input fields, which a limited number of
+        # combinations may not achieve.
+        coverages = self.coverages
+        if not coverages:
+            return
+        if self.showAll:
+            self.stream.writeln('\nInput interactions covered:')
+            for name, coverage in sorted(coverages.items()):
+                self.stream.writeln(
+                    f"{coverage['coverage']:8.1%}  {name} "
+                    f"({coverage['cases']} combinations, "
+                    f"{coverage['strength']}-wise)"
+                )
+        else:
+            name = min(coverages, key=lambda name: (
+                coverages[name]['coverage'], name
+            ))
+            coverage = coverages[name]['coverage']
+            if coverage == 1.0:
+                self.stream.writeln(
+                    f'\nInput combinations cover all input interactions of '
+                    f'{len(coverages)} exercises.'
+                )
+            else:
+                self.stream.writeln(
+                    f'\nInput combinations cover at least {coverage:.1%} of '
+                    f'the input interactions of {len(coverages)} exercises, '
+                    f'least for {name}.'
+                )
+        self.stream.flush()
+
+    def print_durations(self, n):
+        for title, timings, label in (
+            ('tests', self.test_timings, 'test'),
+            ('input combinations', self.input_timings, 'input'),
+        ):
+            if not timings:
+                continue
+            slowest = sorted(
+                timings, key=lambda timing: timing['wall'], reverse=True
+            )[:n]
+            self.stream.writeln(f'\nSlowest {len(slowest)} {title}:')
+            for timing in slowest:
+                self.stream.writeln(
+                    f"{timing['wall']:8.3f}s wall {timing['cpu']:8.3f}s cpu  "
+                    f"{timing['exercise']}: {timing[label]}"
+                )
+        self.stream.flush()
+
+
+def run_tests(
+    pool, cache=None, runner=None, durations=None, report=None, metadata=None
+):
+    if runner is None:
+        runner = unittest.TextTestRunner(resultclass=TimingTestResult)
+    suite = unittest.TestSuite()
+    exercises = {}
+    for exercise in pool:
+        if cache is not None and cache.passed(exercise):
+            suite.addTest(TestCachedVerdict(exercise))
+            continue
+        for test_case in exercise.test_cases():
+            exercises[id(test_case)] = exercise
+            suite.addTest(test_case)
+    result = runner.run(suite)
+    if isinstance(result, TimingTestResult) and metadata is not None:
+        result.metadata = metadata
+    if cache is not None:
+        failed = set()
+        for test, _ in result.failures + result.errors:
+            if isinstance(test, unittest.case._SubTest):
+                test = test.test_case
+            exercise = exercises.get(id(test))
+            if exercise is not None:
+                failed.add(id(exercise))
+        timings = {}
+        if isinstance(result, TimingTestResult):
+            timings = result.exercise_timings
+        for exercise in pool:
+            if id(exercise) in failed:
+                continue
+            key = exercise_key(exercise)
+            if not cache.passed(exercise):
+                cache.add(exercise, timings.get(key))
+            elif isinstance(result, TimingTestResult):
+                timing = cache.timing(exercise)
+                if timing is not None:
+                    result.cached_timings[key] = timing
+        cache.save()
+    if isinstance(result, TimingTestResult):
+        result.print_parametrizations()
+        result.print_coverages()
+        if durations:
+            result.print_durations(durations)
+        if report is not None:
+            result.write_report(report)
+    return result
+
+
+def shard_spec(value):
+    try:
+        index, count = map(int, value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"A shard has to be given as 'i/N', got '{value}'."
+        )
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(
+            f"The shard index has to be between 1 and {count}, got {index}."
+        )
+    return index, count
+
+
+def shard_pool(pool, index, count, by='hash', timings=None):
+    # Every shard computes the same partition independently, so it must
+    # only depend on the exercises and the given timings.
+    exercises = list(pool)
+    if by == 'hash':
+        def key(exercise):
+            digest = sha3_256(exercise_key(exercise).encode()).hexdigest()
+            return int(digest, 16)
+
+        return [
+            exercise for exercise in exercises
+            if key(exercise) % count == index - 1
+        ]
+    if by == 'duration':
+        # Longest processing time first: Exercises are assigned to the
+        # least loaded shard in descending order of their last durations.
+        # Exercises without timings are assumed to take the mean duration.
+        durations = {
+            key: timing['wall']
+            for key, timing in (timings or {}).get('exercises', {}).items()
+        }
+        default = (
+            sum(durations.values()) / len(durations) if durations else 1.0
+        )
+        exercises.sort(key=lambda exercise: (
+            -durations.get(exercise_key(exercise), default),
+            exercise_key(exercise)
+        ))
+        loads = [0.0] * count
+        shard = []
+        for exercise in exercises:
+            i = min(range(count), key=lambda i: (loads[i], i))
+            loads[i] += durations.get(exercise_key(exercise), default)
+            if i == index - 1:
+                shard.append(exercise)
+        return shard
+    raise ValueError(f"Unknown sharding strategy '{by}'.")
+
+
+def merge_reports(paths):
+    merged = {
+        'shards': [], 'exercises': {}, 'parametrizations': {},
+        'coverages': {}, 'tests': [], 'inputs': []
+    }
+    for path in paths:
+        with open(path) as file:
+            report = json.load(file)
+        merged['shards'].append({
+            'shard': report.get('shard'),
+            'version': report.get('version'),
+            'wall': sum(timing['wall'] for timing in report['tests']),
+        })
+        merged['exercises'] |= report['exercises']
+        merged['parametrizations'] |= report.get('parametrizations', {})
+        merged['coverages'] |= report.get('coverages', {})
+        merged['tests'] += report['tests']
+        merged['inputs'] += report['inputs']
+    for key in ('tests', 'inputs'):
+        merged[key].sort(key=lambda timing: (
+            timing['exercise'], timing.get('test', timing.get('input'))
+        ))
+    return merged
+
+
+def report_summary(report):
+    statuses = collections.Counter(test['status'] for test in report['tests'])
+    lines = [
+        f"Merged {len(report['shards'])} shards with "
+        f"{len(report['exercises'])} exercises and {len(report['tests'])} "
+        f"tests: " + ', '.join(
+            f'{count} {status}' for status, count in sorted(statuses.items())
+        )
+    ]
+    for shard in report['shards']:
+        lines.append(f"  shard {shard['shard']}: {shard['wall']:.2f} s")
+    lines += [
+        f"  {test['status'].upper()}: {test['exercise']}: {test['test']}"
+        for test in report['tests'] if test['status'] in ('fail', 'error')
+    ]
+    return '\n'.join(lines)
+
+
+def run_tests_from_args(pool, args):
+    # Shared by 'python -m pyrope test' and the '%pyrope test' magic.
+    if args.merge:
+        report = merge_reports(args.merge)
+        if args.report is not None:
+            with open(args.report, 'w') as file:
+                json.dump(report, file, indent=1, sort_keys=True)
+        print(report_summary(report))
+        return not any(
+            test['status'] in ('fail', 'error') for test in report['tests']
+        )
+    metadata = {}
+    if args.shard is not None:
+        index, count = args.shard
+        timings = None
+        if args.shard_by == 'duration' and args.timings is not None:
+            with open(args.timings) as file:
+                timings = json.load(file)
+        pool = shard_pool(pool, index, count, args.shard_by, timings)
+        metadata['shard'] = f'{index}/{count}'
+    cache = None
+    if config.test_cache_file:
+        cache = TestResultCache()
+        if args.clear_cache:
+            cache.clear()
+        if args.prune_cache is not None:
+            count = cache.prune(args.prune_cache)
+            cache.save()
+            logger.info(f'Pruned {count} cached test verdicts.')
+        if args.no_cache:
+            cache = None
+    result = run_tests(
+        pool, cache, durations=args.durations, report=args.report,
+        metadata=metadata
+    )
+    return result.wasSuccessful()
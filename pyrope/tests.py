@@ -1,15 +1,180 @@
 
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from hashlib import sha3_256
 import inspect
 import itertools
+import logging
 from packaging import version
+import pickle
+import random
+import time
 import unittest
+import weakref
 
 import matplotlib.pyplot as plt
+import numpy
 
 from pyrope import config, core, nodes
 from pyrope.formatters import TemplateFormatter
 
 
+logger = logging.getLogger('pyrope')
+
+
+def update_digest(digest, value):
+    # Representations of large NumPy arrays are truncated, so arrays are
+    # digested by their data instead.
+    if isinstance(value, numpy.ndarray) and value.dtype != object:
+        digest.update(f'ndarray {value.dtype.str} {value.shape}:'.encode())
+        digest.update(numpy.ascontiguousarray(value).tobytes())
+    elif isinstance(value, numpy.ndarray):
+        digest.update(f'ndarray object {value.shape}:'.encode())
+        for item in value.flat:
+            update_digest(digest, item)
+    elif isinstance(value, dict):
+        digest.update(f'{type(value).__name__} {len(value)}:'.encode())
+        for key in sorted(value, key=repr):
+            update_digest(digest, key)
+            update_digest(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(f'{type(value).__name__} {len(value)}:'.encode())
+        for item in value:
+            update_digest(digest, item)
+    else:
+        data = repr(value).encode()
+        digest.update(f'{type(value).__name__} {len(data)}:'.encode())
+        digest.update(data)
+
+
+def parameters_digest(parameters):
+    digest = sha3_256()
+    update_digest(digest, parameters)
+    return digest.hexdigest()
+
+
+def max_total_scores(exercise, seeds):
+    results = []
+    for seed in seeds:
+        pexercise = core.ParametrizedExercise(exercise, seed=seed)
+        parameters = parameters_digest(pexercise.parameters)
+        results.append((seed, parameters, pexercise.max_total_score))
+    return results
+
+
+def iterate_max_total_scores(exercise, seeds, processes=1, chunk_size=16):
+    if processes > 1:
+        try:
+            pickle.dumps(exercise)
+        except (AttributeError, pickle.PicklingError, TypeError):
+            processes = 1
+    if processes == 1:
+        for seed in seeds:
+            yield from max_total_scores(exercise, (seed,))
+        return
+    # Seeds are handed out in chunks and only a bounded number of chunks is
+    # in flight, so that stopping early does not waste much work.
+    chunks = iter(lambda: list(itertools.islice(seeds, chunk_size)), [])
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        in_flight = set()
+        try:
+            for chunk in chunks:
+                if len(in_flight) >= 2 * processes:
+                    done, in_flight = wait(
+                        in_flight, return_when=FIRST_COMPLETED
+                    )
+                    for future in done:
+                        yield from future.result()
+                in_flight.add(
+                    executor.submit(max_total_scores, exercise, chunk)
+                )
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+
+class Evaluation:
+
+    def __init__(self, pexercise, answers, values=(), errors=()):
+        self.answers = answers
+        self.values = dict(values)
+        self.errors = dict(errors)
+        start, cpu_start = time.perf_counter(), time.process_time()
+        pexercise.answers = answers
+        for name, compute in (
+            ('scores', lambda: pexercise.scores),
+            ('max_scores', lambda: pexercise.max_scores),
+            ('total_score', lambda: pexercise.total_score),
+            ('max_total_score', lambda: pexercise.max_total_score),
+            ('score_output', lambda: self.score_output(pexercise)),
+            ('feedback', lambda: pexercise.feedback),
+        ):
+            try:
+                self.values[name] = compute()
+            except Exception as e:
+                self.errors[name] = e
+        self.wall_time = time.perf_counter() - start
+        self.cpu_time = time.process_time() - cpu_start
+
+    def __getitem__(self, name):
+        if name in self.errors:
+            raise self.errors[name]
+        return self.values[name]
+
+    @staticmethod
+    def score_output(pexercise):
+        # The raw output of the scores method for the current answers, where
+        # empty answers are replaced by default or dummy values.
+        exercise = pexercise.exercise
+        answers = {
+            name: value for name, value in pexercise.answers.items()
+            if value is not None
+        }
+        defaults = pexercise.ifield_defaults(exercise.scores)
+        answers = pexercise.dummy_input | defaults | answers
+        return pexercise.apply(
+            exercise.scores, pexercise.parameters | answers
+        )
+
+
+# Evaluations of all input combinations are shared by all tests of a
+# parametrized exercise. The coverage of the input combinations is given as
+# the number of combinations, the strength and the covered fraction of all
+# interactions of this strength.
+evaluations = weakref.WeakKeyDictionary()
+coverages = weakref.WeakKeyDictionary()
+
+
+def evaluate(pexercise):
+    if pexercise not in evaluations:
+        k = config.maximum_test_repetitions
+        cases, strength, coverage = pexercise.input_coverage(k)
+        coverages[pexercise] = (cases, strength, coverage)
+        logger.info(
+            f'{pexercise.exercise.__class__.__name__}: {cases} input '
+            f'combinations cover {coverage:.1%} of all {strength}-wise input '
+            f'interactions.'
+        )
+        # The output of the scores method for dummy inputs does not depend
+        # on the answers and is evaluated only once.
+        values, errors = {}, {}
+        try:
+            values['dummy_score_output'] = pexercise.apply(
+                pexercise.exercise.scores,
+                pexercise.parameters | pexercise.dummy_input
+            )
+        except Exception as e:
+            errors['dummy_score_output'] = e
+        evaluations[pexercise] = [
+            Evaluation(pexercise, answers, values, errors)
+            for answers in pexercise.input_generator(k)
+        ]
+    return evaluations[pexercise]
+
+
 class TestExercise(unittest.TestCase):
 
     def __init__(self, exercises, method_name):
@@ -19,6 +184,7 @@ class TestExercise(unittest.TestCase):
         except TypeError:
             exercises = (exercises,)
         self.exercises = exercises
+        self.parametrizations_checked = {}
 
     @staticmethod
     def with_all_exercises(test):
@@ -87,14 +253,45 @@ class TestExercise(unittest.TestCase):
         score has to be same over different runs of an exercise.
         '''
         max_total_score = core.ParametrizedExercise(exercise).max_total_score
-        for _ in range(config.maximum_test_repetitions):
-            pexercise = core.ParametrizedExercise(exercise)
-            self.assertEqual(
-                max_total_score, pexercise.max_total_score,
-                f"The maximal total score must not change over different "
-                f"runs of an exercise, got {max_total_score} and "
-                f"{pexercise.max_total_score} as a maximal total score."
-            )
+        seeds = (
+            random.getrandbits(64)
+            for _ in range(config.maximum_test_repetitions)
+        )
+        results = iterate_max_total_scores(
+            exercise, seeds, processes=config.test_processes
+        )
+        start = time.perf_counter()
+        distinct_parameters = set()
+        checked = 0
+        try:
+            for seed, parameters, score in results:
+                checked += 1
+                distinct_parameters.add(parameters)
+                self.assertEqual(
+                    max_total_score, score,
+                    f"The maximal total score must not change over different "
+                    f"runs of an exercise, got {max_total_score} and {score} "
+                    f"as a maximal total score (seed {seed})."
+                )
+                if (
+                    config.test_distinct_parameters is not None and
+                    len(distinct_parameters) >=
+                    config.test_distinct_parameters
+                ):
+                    break
+                if (
+                    config.test_time_budget is not None and
+                    time.perf_counter() - start >= config.test_time_budget
+                ):
+                    break
+        finally:
+            results.close()
+            self.parametrizations_checked[exercise.__class__] = checked
+        logger.info(
+            f'{exercise.__class__.__name__}: Maximal total score checked for '
+            f'{checked} parametrizations with {len(distinct_parameters)} '
+            f'distinct parameter sets.'
+        )
 
 
 class TestParametrizedExercise(unittest.TestCase):
@@ -134,10 +331,7 @@ class TestParametrizedExercise(unittest.TestCase):
             f"The 'preamble' method must return a string, not an instance of "
             f"{preamble.__class__}."
         )
-        ofields = {
-            ofield for _, ofield, _ in TemplateFormatter.parse(preamble)
-            if ofield is not None
-        }
+        ofields = set(TemplateFormatter.compile(preamble).field_names)
         for ofield in ofields:
             self.assertIn(
                 ofield, pexercise.parameters,
@@ -222,10 +416,7 @@ class TestParametrizedExercise(unittest.TestCase):
             f"The 'feedback' method must return a string, not an instance "
             f"of {feedback.__class__}."
         )
-        ofields = {
-            ofield for _, ofield, _ in TemplateFormatter.parse(feedback)
-            if ofield is not None
-        }
+        ofields = set(TemplateFormatter.compile(feedback).field_names)
         for ofield in ofields:
             self.assertIn(
                 ofield, kwargs,
@@ -396,89 +587,91 @@ class TestParametrizedExercise(unittest.TestCase):
     @staticmethod
     def with_all_pexercises_and_all_inputs(test):
         def wrapped_test(self):
-            k = config.maximum_test_repetitions
             for pexercise in self.pexercises:
                 exercise_class = pexercise.exercise.__class__
-                input_generator = pexercise.input_generator()
-                for input_data in itertools.islice(input_generator, 0, k):
-                    pexercise.answers = input_data
+                for evaluation in evaluate(pexercise):
                     with self.subTest(exercise=exercise_class,
-                                      input=input_data):
-                        test(self, pexercise)
+                                      input=evaluation.answers):
+                        test(self, pexercise, evaluation)
         return wrapped_test
 
     @with_all_pexercises_and_all_inputs
-    def test_total_score_is_non_negative(self, pexercise):
+    def test_total_score_is_non_negative(self, pexercise, evaluation):
         """
         The total score should not be negative.
         """
         self.assertGreaterEqual(
-            pexercise.total_score, 0.0,
+            evaluation['total_score'], 0.0,
             'The maximal total score is negative.'
         )
 
     @with_all_pexercises_and_all_inputs
-    def test_total_score_is_less_equal_maximal_total_score(self, pexercise):
+    def test_total_score_is_less_equal_maximal_total_score(
+        self, pexercise, evaluation
+    ):
         """
         The total score should be less or equal the maximal total score.
         """
         self.assertLessEqual(
-            pexercise.total_score, pexercise.max_total_score,
+            evaluation['total_score'], evaluation['max_total_score'],
             'The total score is greater than the maximal total score.'
         )
 
     @with_all_pexercises_and_all_inputs
-    def test_scores_are_non_negative(self, pexercise):
+    def test_scores_are_non_negative(self, pexercise, evaluation):
         """
         The input field scores should not be negative.
         """
         # Note that either all or none of the input fields are scored.
-        if None in pexercise.scores.values():
+        scores = evaluation['scores']
+        if None in scores.values():
             return
-        for ifield, score in pexercise.scores.items():
+        for ifield, score in scores.items():
             self.assertGreaterEqual(
                 score, 0.0,
                 f'The score for input field {ifield} is negative.'
             )
 
     @with_all_pexercises_and_all_inputs
-    def test_scores_are_less_equal_maximal_scores(self, pexercise):
+    def test_scores_are_less_equal_maximal_scores(
+        self, pexercise, evaluation
+    ):
         """
         For each input field the score should be less or equal the maximal
         score.
         """
         # Note that either all or none of the input fields are scored.
-        if None in pexercise.scores.values():
+        scores, max_scores = evaluation['scores'], evaluation['max_scores']
+        if None in scores.values():
             return
         for ifield in pexercise.ifields:
             self.assertLessEqual(
-                pexercise.scores[ifield], pexercise.max_scores[ifield],
+                scores[ifield], max_scores[ifield],
                 f'The score for input field {ifield} is greater than the '
                 f'maximal score.'
             )
 
     @with_all_pexercises_and_all_inputs
-    def test_score_sum_is_not_greater_total_score(self, pexercise):
+    def test_score_sum_is_not_greater_total_score(
+        self, pexercise, evaluation
+    ):
         """
         The total score is equal to the sum of all input field scores if the
         input fields are scored individually.
         """
         # TODO: This should be a framework test and not a test for users.
         # Note that either all or none of the input fields are scored.
-        score_output = pexercise.apply(
-            pexercise.exercise.scores,
-            pexercise.parameters | pexercise.dummy_input
-        )
-        scores = pexercise.scores.values()
+        score_output = evaluation['dummy_score_output']
+        scores = evaluation['scores'].values()
         if isinstance(score_output, dict) or len(pexercise.ifields) == 1:
             self.assertEqual(
-                sum(scores), pexercise.total_score,
+                sum(scores), evaluation['total_score'],
                 'The sum of the input field scores is not equal to the '
                 'total score.'
             )
 
     @with_all_pexercises_and_all_inputs
-    def test_score_method_return_values(self, pexercise):
+    def test_score_method_return_values(self, pexercise, evaluation):
         """
         The score method of an exercise can return the scores for the answers
         in several formats:
@@ -495,15 +688,7 @@ class TestParametrizedExercise(unittest.TestCase):
               in the key.
         """
         exercise = pexercise.exercise
-        answers = {
-            name: value for name, value in pexercise.answers.items()
-            if value is not None
-        }
-        defaults = pexercise.ifield_defaults(exercise.scores)
-        answers = pexercise.dummy_input | defaults | answers
-        scores = pexercise.apply(
-            exercise.scores, pexercise.parameters | answers
-        )
+        scores = evaluation['score_output']
         self.assertTrue(
             isinstance(scores, core.float_types + (tuple, dict)) or
             scores is None,
@@ -578,15 +763,15 @@ class TestParametrizedExercise(unittest.TestCase):
             )
 
     @with_all_pexercises_and_all_inputs
-    def test_feedback_with_inputs(self, pexercise):
+    def test_feedback_with_inputs(self, pexercise, evaluation):
         """
         Test if inputs (especially None values) raise an exception in the
         feedback method.
         """
         try:
-            pexercise.feedback
+            evaluation['feedback']
         except Exception:
             self.fail(
                 f"The feedback method raises an error for the following "
-                f"inputs: {pexercise.answers}."
+                f"inputs: {evaluation.answers}."
             )
@@ -0,0 +1,247 @@
+from fractions import Fraction
+import json
+import struct
+from uuid import UUID
+
+import numpy
+
+from pyrope import config
+from pyrope.errors import IllPosedError, PyRopeError, ValidationError
+from pyrope.messages import (
+    ChangeWidgetAttribute, ChangeWidgetAttributes, CreateWidget,
+    ExerciseAttribute, Message, MessageBatch, RenderTemplate, Submit,
+    WaitingForSubmission, WidgetValidationError
+)
+
+
+# Version of the wire format. Peers refuse messages of other versions.
+version = 1
+
+# Message classes with the names of their fields in the order of their
+# constructor arguments after the sender.
+message_fields = {
+    ChangeWidgetAttribute: ('widget_id', 'attribute_name', 'attribute_value'),
+    ChangeWidgetAttributes: ('widget_id', 'attributes'),
+    CreateWidget: ('widget_id', 'widget_type'),
+    ExerciseAttribute: ('attribute_name', 'attribute_value'),
+    MessageBatch: ('messages',),
+    RenderTemplate: ('template_type', 'template'),
+    Submit: (),
+    WaitingForSubmission: (),
+    WidgetValidationError: ('error', 'widget_id'),
+}
+message_classes = {cls.__name__: cls for cls in message_fields}
+
+error_classes = {
+    cls.__name__: cls for cls in (IllPosedError, PyRopeError, ValidationError)
+}
+
+header = struct.Struct('!I')
+
+
+def encode_value(value):
+    """
+    Convert a value to JSON compatible data. Values which JSON cannot
+    represent are tagged with their type, e.g. '{"__type__": "tuple",
+    "value": [1, 2]}'. Values of unknown types, e.g. SymPy expressions, are
+    sent as their string representation, which is how templates render them.
+    """
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, int):
+        return int(value)
+    if isinstance(value, float):
+        return float(value)
+    if isinstance(value, list):
+        return [encode_value(item) for item in value]
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value) and (
+            '__type__' not in value
+        ):
+            return {key: encode_value(item) for key, item in value.items()}
+        return tagged('dict', [
+            [encode_value(key), encode_value(item)]
+            for key, item in value.items()
+        ])
+    if isinstance(value, Message):
+        return tagged('message', encode_message(value))
+    if isinstance(value, tuple):
+        return tagged('tuple', [encode_value(item) for item in value])
+    if isinstance(value, (set, frozenset)):
+        return tagged('set', [encode_value(item) for item in value])
+    if isinstance(value, UUID):
+        return tagged('uuid', value.hex)
+    if isinstance(value, complex):
+        return tagged('complex', [value.real, value.imag])
+    if isinstance(value, Fraction):
+        return tagged('fraction', [value.numerator, value.denominator])
+    if isinstance(value, numpy.ndarray):
+        return tagged('ndarray', {
+            'dtype': value.dtype.str,
+            'shape': list(value.shape),
+            'data': [encode_value(item) for item in value.ravel().tolist()],
+        })
+    if isinstance(value, numpy.generic):
+        return encode_value(value.item())
+    if isinstance(value, type):
+        return f'{value.__module__}.{value.__qualname__}'
+    if isinstance(value, Exception):
+        return tagged('error', {
+            'type': type(value).__name__,
+            'args': [encode_value(arg) for arg in value.args],
+        })
+    return str(value)
+
+
+def tagged(type_name, value):
+    return {'__type__': type_name, 'value': value}
+
+
+def decode_value(data):
+    # Only the types tagged by 'encode_value' are reconstructed, nothing is
+    # evaluated.
+    if isinstance(data, list):
+        return [decode_value(item) for item in data]
+    if not isinstance(data, dict):
+        return data
+    if '__type__' not in data:
+        return {key: decode_value(item) for key, item in data.items()}
+    type_name, value = data['__type__'], data['value']
+    match type_name:
+        case 'complex':
+            return complex(*value)
+        case 'dict':
+            return {
+                decode_value(key): decode_value(item) for key, item in value
+            }
+        case 'error':
+            cls = error_classes.get(value['type'], PyRopeError)
+            return cls(*[decode_value(arg) for arg in value['args']])
+        case 'fraction':
+            return Fraction(*value)
+        case 'message':
+            return decode_message(value)
+        case 'ndarray':
+            data = [decode_value(item) for item in value['data']]
+            array = numpy.empty(len(data), dtype=numpy.dtype(value['dtype']))
+            array[:] = data
+            return array.reshape(value['shape'])
+        case 'set':
+            return {decode_value(item) for item in value}
+        case 'tuple':
+            return tuple(decode_value(item) for item in value)
+        case 'uuid':
+            return UUID(hex=value)
+    raise ValueError(f"Unknown type '{type_name}'.")
+
+
+def encode_message(msg):
+    cls = type(msg)
+    if cls not in message_fields:
+        raise TypeError(f'Cannot encode messages of type {cls.__name__}.')
+    return [version, cls.__name__, encode_value(msg.sender)] + [
+        encode_value(getattr(msg, name)) for name in message_fields[cls]
+    ]
+
+
+def decode_message(data):
+    message_version, type_name, sender, *fields = data
+    if message_version != version:
+        raise ValueError(
+            f'Unsupported wire format version {message_version}, '
+            f'expected {version}.'
+        )
+    try:
+        cls = message_classes[type_name]
+    except KeyError:
+        raise ValueError(f"Unknown message type '{type_name}'.")
+    if len(fields) != len(message_fields[cls]):
+        raise ValueError(f'Malformed {type_name} message.')
+    return cls(sender, *[decode_value(field) for field in fields])
+
+
+def dumps(msg):
+    return json.dumps(encode_message(msg), separators=(',', ':')).encode()
+
+
+def loads(data):
+    return decode_message(json.loads(data))
+
+
+class Connection:
+    """
+    Sends and receives messages over a binary stream, e.g. a socket file or
+    a pipe. Every message is sent as a 4 byte big-endian length followed by
+    its JSON encoding.
+    """
+
+    def __init__(self, reader, writer=None):
+        self.reader = reader
+        self.writer = reader if writer is None else writer
+
+    @classmethod
+    def from_socket(cls, sock):
+        return cls(sock.makefile('rwb'))
+
+    def send(self, msg):
+        data = dumps(msg)
+        self.writer.write(header.pack(len(data)) + data)
+        self.writer.flush()
+
+    def receive(self):
+        # Returns None as soon as the peer closed the connection.
+        prefix = self.reader.read(header.size)
+        if len(prefix) < header.size:
+            return None
+        size, = header.unpack(prefix)
+        if size > config.maximum_message_size:
+            raise ValueError(
+                f'Message size {size} exceeds limit '
+                f'{config.maximum_message_size}.'
+            )
+        data = self.reader.read(size)
+        if len(data) < size:
+            return None
+        return loads(data)
+
+    def __iter__(self):
+        while (msg := self.receive()) is not None:
+            yield msg
+
+    def close(self):
+        self.reader.close()
+        if self.writer is not self.reader:
+            self.writer.close()
+
+
+class RemoteRunner:
+    """
+    Stands in for an :py:class:`ExerciseRunner` in another process, so that
+    frontends can be connected to it via 'set_runner'.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.observers = []
+
+    def register_observer(self, observer):
+        self.observers.append(observer)
+
+    def observer(self, msg):
+        self.connection.send(msg)
+
+    def serve(self):
+        for msg in self.connection:
+            for observer in self.observers:
+                observer(msg)
+
+
+def serve_runner(runner, connection):
+    """
+    Run an exercise for a frontend at the other end of 'connection' until
+    the connection is closed.
+    """
+    runner.register_observer(connection.send)
+    runner.run()
+    for msg in connection:
+        runner.observer(msg)